@@ -0,0 +1,333 @@
+import asyncio
+import collections
+import itertools
+import logging
+from .Exceptions import SimproErrorHandler
+from .Sessions import Sessions
+from .JsonDecoder import JsonDecoder
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class AsyncSessions(object):
+    """Class to manage asyncio Simpro API Sessions
+
+        Notes:
+            Requires the optional aiohttp dependency, pip install SimproAPI[async]
+            Unlike Sessions the endpoint methods return the decoded json body.
+    """
+    def __init__(self,server,token,max_concurrency=50,retries=5,backoff_factor=0.5,timeout=5,page_size=250,max_page_workers=4,json_decoder=None,rate_limit_retries=5):
+        """
+            Arguments:
+                server {string} -- Server URI
+                token {string} -- Token value to be used for accessing the API
+                max_concurrency {int} -- Maximum number of requests in flight at once
+                retries {int} -- Number of times to retry a request on connection errors
+                backoff_factor {float} -- Backoff factor applied between retries
+                timeout {int} -- Total timeout in seconds of each request
+                page_size {int} -- Number of items requested per page, 250 is the most the API allows
+                max_page_workers {int} -- Maximum number of pages fetched concurrently by get_pages
+                json_decoder {JsonDecoder} -- Decoder of response bodies, defaults to the fastest backend installed
+                rate_limit_retries {int} -- Number of times a rate limited (429) request is retried
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncSessions requires aiohttp, install it with: pip install SimproAPI[async]')
+        self.server=server
+        self.token=token
+        self.max_concurrency=max_concurrency
+        self.retries=retries
+        self.backoff_factor=backoff_factor
+        self.timeout=timeout
+        self.page_size=page_size
+        self.max_page_workers=max_page_workers
+        self.json_decoder=JsonDecoder() if json_decoder is None else json_decoder
+        self.rate_limit_retries=rate_limit_retries
+        self.headers={'Authorization': 'Bearer {0}'.format(token),'Accept':'application/json'}
+        self.session=None
+        self.semaphore=None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self,exec_types,exec_val,exc_tb):
+        await self.close()
+
+    async def open(self):
+        """Opens the underlying aiohttp session, must be called from within the event loop"""
+        if self.session is None:
+            self.semaphore=asyncio.Semaphore(self.max_concurrency)
+            self.session=aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency))
+
+    async def close(self):
+        """Closes the underlying aiohttp session"""
+        if self.session is not None:
+            await self.session.close()
+            self.session=None
+
+    async def request(self,method,url,**kwargs):
+        """Sends a request while holding a slot of the in-flight request limit
+
+            Arguments:
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                kwargs -- Passed through to aiohttp
+            Returns:
+                decoded json body, None if it is empty
+        """
+        body,headers=await self.request_with_headers(method,url,**kwargs)
+        return body
+
+    async def request_with_headers(self,method,url,**kwargs):
+        """Same as request but also returns the response headers
+
+            Notes:
+                Like Sessions.send a 429 response or a Retry-After header is waited out and the
+                request is retried up to rate_limit_retries times, without holding a slot meanwhile.
+                Other error statuses raise through SimproErrorHandler.
+
+            Returns:
+                {tuple} -- (decoded json body, response headers)
+        """
+        await self.open()
+        attempt=0
+        rate_limit_attempt=0
+        while True:
+            try:
+                async with self.semaphore:
+                    async with self.session.request(method,url,**kwargs) as results:
+                        if results.status < 400:
+                            body=await results.read()
+                            return (self.json_decoder.loads(body) if body else None),results.headers
+                        retry_after=Sessions.retry_after(results)
+                        if (results.status != 429 and retry_after is None) or rate_limit_attempt >= self.rate_limit_retries:
+                            SimproErrorHandler(results)
+                rate_limit_attempt += 1
+                delay=retry_after if retry_after is not None else self.backoff_factor * (2 ** (rate_limit_attempt - 1))
+                logger.debug('Rate limited '+method+' '+url+' status: '+str(results.status)+' retrying in '+str(delay)+'s')
+                await asyncio.sleep(delay)
+            except (aiohttp.ClientConnectionError,asyncio.TimeoutError) as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                delay=self.backoff_factor * (2 ** (attempt - 1))
+                logger.debug('Retrying '+method+' '+url+' in '+str(delay)+'s: '+repr(e))
+                await asyncio.sleep(delay)
+
+    async def get_pages(self,url,params={}):
+        """Gets every page of a list endpoint
+
+            Notes:
+                The first page is fetched on its own to learn the Result-Pages header,
+                the remaining pages are then fetched concurrently, at most max_page_workers at once.
+                Pages are always yielded in order.
+
+            Arguments:
+                url {string} -- Full url of the list endpoint
+                params {dict} -- Params/query options to pass to the request
+            Yields:
+                decoded json body of each page
+        """
+        params=dict(params)
+        params.setdefault('pageSize',self.page_size)
+        body,headers=await self.request_with_headers('GET',url,params=dict(params,page=1))
+        yield body
+        last_page=int(headers.get('Result-Pages') or 1)
+        pages=iter(range(2,last_page+1))
+        window=collections.deque(
+            asyncio.ensure_future(self.request('GET',url,params=dict(params,page=page_number)))
+            for page_number in itertools.islice(pages,self.max_page_workers))
+        try:
+            while window:
+                body=await window.popleft()
+                for page_number in itertools.islice(pages,1):
+                    window.append(asyncio.ensure_future(self.request('GET',url,params=dict(params,page=page_number))))
+                yield body
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def companies_get_all(self,params={}):
+        """Gets a list of all companies in the client's build.
+
+            Notes:
+                Can Handle Pagination
+
+            Arguments:
+                params {dict} -- Params/query options to pass to the request
+            Yields:
+                decoded json body of each page
+        """
+        uri = '/api/v1.0/companies/'
+        url = self.server + uri
+        async for page in self.get_pages(url,params):
+            yield page
+
+    async def companies_get_specific(self,company_id,params={}):
+        """Get list of Companies from the client's build
+
+            Arguments:
+                company_id {int} -- ID of the company
+                params {dict} -- Params/query options to pass to the request
+            Returns:
+                decoded json body
+        """
+        uri = '/api/v1.0/companies/{0}'.format(company_id)
+        url = self.server + uri
+        return await self.request('GET',url,params=params)
+
+    async def plants_and_equipment_get_all(self,company_id,plant_type_id,params={}):
+        """Get all plant and equipment
+
+            Notes:
+                Can Handle Pagination
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                params {dict} -- Params/query options to pass to the request
+            Yields:
+                decoded json body of each page
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/'.format(company_id,plant_type_id)
+        url = self.server + uri
+        async for page in self.get_pages(url,params):
+            yield page
+
+    async def plants_and_equipment_get_specific(self,company_id,plant_type_id,plant_id,params={}):
+        """Get details from a specific plant and equipment
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant_id {interger} -- ID of the plant
+                params {dict} -- Params/query options to pass to the request
+            Returns:
+                decoded json body
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}'.format(company_id,plant_type_id,plant_id)
+        url = self.server + uri
+        return await self.request('GET',url,params=params)
+
+    async def plants_and_equipment_custom_fields_get_all(self,company_id,plant_type_id,plant_id,params={}):
+        """Get all plant and equipment Custom Fields
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant_id {interger} -- ID of the plant
+                params {dict} -- Params/query options to pass to the request
+            Returns:
+                decoded json body
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/'.format(company_id,plant_type_id,plant_id)
+        url = self.server + uri
+        return await self.request('GET',url,params=params)
+
+    async def plants_and_equipment_custom_fields_get_pages(self,company_id,plant_type_id,plant_id,params={}):
+        """Get all plant and equipment Custom Fields, following pagination
+
+            Notes:
+                Same as plants_and_equipment_custom_fields_get_all, which only returns the first page
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant_id {interger} -- ID of the plant
+                params {dict} -- Params/query options to pass to the request
+            Yields:
+                decoded json body of each page
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/'.format(company_id,plant_type_id,plant_id)
+        url = self.server + uri
+        async for page in self.get_pages(url,params):
+            yield page
+
+    async def plants_and_equipment_custom_fields_get_specific(self,company_id,plant_type_id,plant_id,custom_field_id,params={}):
+        """Get details from a specific plant and equipment Custom Field
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant_id {interger} -- ID of the plant
+                custom_field_id {interger} -- ID of the Custom Field
+                params {dict} -- Params/query options to pass to the request
+            Returns:
+                decoded json body
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/{3}'.format(company_id,plant_type_id,plant_id,custom_field_id)
+        url = self.server + uri
+        return await self.request('GET',url,params=params)
+
+    async def plants_and_equipment_custom_fields_patch_specific(self,company_id,plant_type_id,plant_id,custom_field_id,data):
+        """Patch details to a specific plant and equipment Custom Field
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant_id {interger} -- ID of the plant
+                custom_field_id {interger} -- ID of the Custom Field
+                data -- Body of the patch request
+            Returns:
+                decoded json body
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/{3}'.format(company_id,plant_type_id,plant_id,custom_field_id)
+        url = self.server + uri
+        return await self.request('PATCH',url,data=data)
+
+    async def plant_type_get_all(self,company_id,params={}):
+        """Get all Plant Types from a company
+
+            Notes:
+                Can Handle Pagination
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                params {dict} -- Params/query options to pass to the request
+            Yields:
+                decoded json body of each page
+        """
+        uri = "/api/v1.0/companies/{0}/plantTypes/".format(company_id)
+        url = self.server + uri
+        async for page in self.get_pages(url,params):
+            yield page
+
+    async def plant_type_custom_fields_get_all(self,company_id,plant_type_id,params={}):
+        """Get all plant type Custom Fields
+
+            Notes:
+                Can Handle Pagination
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                params {dict} -- Params/query options to pass to the request
+            Yields:
+                decoded json body of each page
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/customFields/'.format(company_id,plant_type_id)
+        url = self.server + uri
+        async for page in self.get_pages(url,params):
+            yield page
+
+    async def plant_type_custom_fields_get_specific(self,company_id,plant_type_id,plant_type_custom_field_id,params={}):
+        """Get details from a specific plant type Custom Field
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant_type_custom_field_id {interger} -- ID of the Custom Field
+                params {dict} -- Params/query options to pass to the request
+            Returns:
+                decoded json body
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/customFields/{2}'.format(company_id,plant_type_id,plant_type_custom_field_id)
+        url = self.server + uri
+        return await self.request('GET',url,params=params)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from .AsyncSessions import AsyncSessions
+from .Trackables import Trackables
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class AsyncTrackables(object):
+    """Class containing asyncio methods to find Trackable Plants and Equipment"""
+
+    def __init__(self,server,token,max_concurrency=50):
+        """
+            Arguments:
+                server {string} -- Server URI
+                token {string} -- Token value to be used for accessing the API
+                max_concurrency {int} -- Maximum number of requests in flight at once
+        """
+        self.simpro_session=AsyncSessions(server,token,max_concurrency=max_concurrency)
+
+    async def __aenter__(self):
+        await self.simpro_session.open()
+        return self
+
+    async def __aexit__(self,exec_types,exec_val,exc_tb):
+        await self.simpro_session.close()
+
+    async def get_companies(self,company_id,custom_field_names,fetch_mode='specific'):
+        """Finds all trackable equipment in a simpro company or companies
+
+            Arguments:
+                company_id {list} -- ID's of the companies to search
+                custom_field_names {list} -- list of custom field names to match against
+                fetch_mode {string} -- How custom field values are retrieved, see Trackables.get_equipment_custom_fields
+
+            Yields:
+                {dictionary} -- Same structure as Trackables.get_companies
+        """
+        for company in company_id:
+            result={
+                'id':company,
+                'trackable_plants':[]
+            }
+            logger.debug('Getting trackable equipment for company: '+str(company))
+            async for trackable_plant_type in self.get_plant_types(company,custom_field_names):
+                logger.debug('Getting trackable equipment for plant: '+str(trackable_plant_type['id']))
+                trackable_plant_results=[]
+                async for trackable_plant in self.get_equipment(
+                    company,
+                    trackable_plant_type['id'],
+                    [custom_fields['id'] for custom_fields in trackable_plant_type['custom_fields']],
+                    fetch_mode
+                ):
+                    trackable_plant_results.append(trackable_plant)
+                trackable_plant_type['trackable_plant']=trackable_plant_results
+                result['trackable_plants'].append(trackable_plant_type)
+            if result['trackable_plants']:
+                logger.debug('Successfully found specified custom_field_names: {company_id: '+str(company)+'}')
+                yield result
+            else:
+                logger.debug('Failed to find specified custom_field_names: {company_id: '+str(company))
+
+    async def get_plant_types(self,company_id,custom_field_names):
+        """Finds all trackable Plant Types from a Simpro Company
+
+            Notes:
+                The custom fields of every plant type are requested concurrently.
+
+            Arguments:
+                company_id {integer} -- ID of the company to search.
+                custom_field_names {list} -- name of the custom fields to find the ID of.
+
+            Yields:
+                {dictonary} -- {
+                    id: #ID of the plant type
+                    custom_fields:[
+                        id:
+                        name:
+                    ]}
+        """
+        plant_types=[]
+        async for page in self.simpro_session.plant_type_get_all(company_id,{'columns':'ID'}):
+            plant_types.extend(page)
+        logger.debug('Getting trackable plant types for company_id: '+ str(company_id))
+        plant_custom_fields=await asyncio.gather(*[
+            self.get_plant_type_custom_fields(company_id,plant_type['ID'])
+            for plant_type in plant_types])
+        for plant_type,custom_fields in zip(plant_types,plant_custom_fields):
+            results = {
+                'id':plant_type['ID'],
+                'custom_fields':[{
+                        'id':plant_custom_field['ID'],
+                        'name':plant_custom_field['Name']
+                    } for plant_custom_field in custom_fields
+                    if plant_custom_field.get('Name') in custom_field_names]
+            }
+            if results['custom_fields']:
+                logger.debug('Successfully Found specified custom_field_names in: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type['ID'])+'}')
+                yield results
+            else:
+                logger.debug('Failed to find specified custom_field_names in: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type['ID'])+'}')
+
+    async def get_plant_type_custom_fields(self,company_id,plant_type_id):
+        """Gets every custom field of a plant type across all pages
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+            Returns:
+                {list} -- decoded custom fields
+        """
+        custom_fields=[]
+        async for page in self.simpro_session.plant_type_custom_fields_get_all(company_id,plant_type_id):
+            custom_fields.extend(page)
+        return custom_fields
+
+    async def get_equipment(self,company_id,plant_type_id,custom_field_ids,fetch_mode='specific'):
+        """Finds all trackable equipment from a Simpro Plant
+
+            Notes:
+                Every custom field of every plant on a page is requested concurrently,
+                bounded by the max_concurrency of the session. Results are yielded as they complete.
+
+            Arguments:
+                company_id {integer} -- ID of the company to search
+                plant_type_id {integer} -- ID of the Plant to search
+                custom_field_ids {list} -- list of custom field ids to get the custom field values of
+                fetch_mode {string} -- How custom field values are retrieved, see Trackables.get_equipment_custom_fields
+
+            Yields:
+                {dictonary} -- {
+                    id: #ID of the equipment
+                    custom_fields:[{
+                        id:
+                        name:
+                        value:
+                    }]
+                }
+        """
+        logger.debug('Getting trackable equipment from Plant id: '+ str(plant_type_id))
+        async for page in self.simpro_session.plants_and_equipment_get_all(
+            company_id,
+            plant_type_id,
+            {'columns':'ID,CustomFields'} if fetch_mode == 'columns' else {'columns':'ID'}
+        ):
+            tasks=[asyncio.ensure_future(self.get_equipment_custom_fields(
+                company_id,
+                plant_type_id,
+                equipment,
+                custom_field_ids,
+                fetch_mode)) for equipment in page]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    results=await task
+                    if results:
+                        yield results
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def get_equipment_custom_fields(self,company_id,plant_type_id,plant,custom_field_ids,fetch_mode='specific'):
+        """Gets the specified custom fields of a single plant
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant {dict} -- plant as returned by plants_and_equipment_get_all E.G. {'ID': 123}
+                custom_field_ids {list} -- list of custom field ids to get the custom field values of
+                fetch_mode {string} -- How custom field values are retrieved, see Trackables.get_equipment_custom_fields
+            Returns:
+                {dictonary} -- Same structure as yielded by get_equipment or None if no fields were found
+        """
+        plant_id=plant['ID']
+        if fetch_mode == 'specific':
+            custom_fields=await asyncio.gather(*[
+                self.simpro_session.plants_and_equipment_custom_fields_get_specific(
+                    company_id,
+                    plant_type_id,
+                    plant_id,
+                    custom_field_id
+                ) for custom_field_id in custom_field_ids])
+        elif fetch_mode == 'batch':
+            custom_fields=[]
+            async for page in self.simpro_session.plants_and_equipment_custom_fields_get_pages(company_id,plant_type_id,plant_id):
+                custom_fields.extend(page or [])
+        elif fetch_mode == 'columns':
+            custom_fields=plant.get('CustomFields') or []
+        else:
+            raise ValueError('Unknown fetch_mode: '+str(fetch_mode))
+        custom_fields_results=Trackables.format_custom_fields(custom_fields,custom_field_ids)
+        if custom_fields_results:
+            logger.debug('Successfully found custom_field_ids: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type_id)+' plant_id: '+str(plant_id)+'}')
+            return {
+                'id':plant_id,
+                'custom_fields':custom_fields_results
+            }
+        logger.debug('Failed to find custom_field_ids: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type_id)+' plant_id: '+str(plant_id)+'}')
@@ -0,0 +1,210 @@
+import sqlite3
+import contextlib
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class CrawlCheckpoint(object):
+    """Durable sqlite record of the finished units of a Trackables crawl, used to resume it
+
+        Notes:
+            Records the plant types found for each company, the page count of each plant type,
+            the plant pages that are done with their results, the plants already yielded from
+            pages that aren't done, and the companies that are done.
+            A crawl with different arguments clears the checkpoint, and Trackables clears it
+            once a crawl completes. Use one checkpoint file per crawl that may run at once.
+            Results are recorded as delivered once yielded, and skipped when the crawl is resumed.
+    """
+    def __init__(self,save_location=None):
+        """
+            Arguments:
+                save_location {string} -- Location of the sqlite file, defaults to simpro_checkpoint.sqlite
+        """
+        self.save_location='simpro_checkpoint.sqlite' if not save_location else save_location
+        self.lock=threading.Lock()
+        with self.connect() as connection:
+            connection.executescript('''
+                CREATE TABLE IF NOT EXISTS crawl (
+                    key TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS companies (
+                    company_id INTEGER PRIMARY KEY,
+                    plant_types TEXT,
+                    high_water_marks TEXT,
+                    done INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS page_counts (
+                    company_id INTEGER NOT NULL,
+                    plant_type_id INTEGER NOT NULL,
+                    pages INTEGER NOT NULL,
+                    PRIMARY KEY (company_id,plant_type_id)
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    company_id INTEGER NOT NULL,
+                    plant_type_id INTEGER NOT NULL,
+                    page INTEGER NOT NULL,
+                    records TEXT,
+                    PRIMARY KEY (company_id,plant_type_id,page)
+                );
+                CREATE TABLE IF NOT EXISTS delivered (
+                    company_id INTEGER NOT NULL,
+                    plant_type_id INTEGER NOT NULL,
+                    page INTEGER NOT NULL,
+                    plant_id INTEGER NOT NULL,
+                    PRIMARY KEY (company_id,plant_type_id,page,plant_id)
+                );
+            ''')
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Opens a connection to the checkpoint, commits on success and always closes it"""
+        connection=sqlite3.connect(self.save_location,timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def start(self,key):
+        """Resumes the checkpoint of a crawl, clearing it if it belongs to a different crawl
+
+            Arguments:
+                key {string} -- Identifies the crawl, E.G. its arguments
+        """
+        with self.lock, self.connect() as connection:
+            row=connection.execute('SELECT key FROM crawl').fetchone()
+            if row is not None and row[0] == key:
+                logger.debug('Resuming crawl checkpoint: '+self.save_location)
+                return
+            if row is not None:
+                logger.info('Clearing crawl checkpoint of a different crawl: '+self.save_location)
+            self.delete(connection)
+            connection.execute('INSERT INTO crawl (key) VALUES (?)',(key,))
+
+    def clear(self):
+        """Forgets every finished unit"""
+        with self.lock, self.connect() as connection:
+            self.delete(connection)
+
+    @staticmethod
+    def delete(connection):
+        for table in ('crawl','companies','page_counts','pages','delivered'):
+            connection.execute('DELETE FROM '+table)
+
+    def done_companies(self):
+        """IDs of the companies that are done
+
+            Returns:
+                {set} -- company IDs
+        """
+        with self.lock, self.connect() as connection:
+            return {row[0] for row in connection.execute('SELECT company_id FROM companies WHERE done=1')}
+
+    def company_done(self,company_id):
+        """Marks a company done and drops its page results"""
+        with self.lock, self.connect() as connection:
+            connection.execute('DELETE FROM pages WHERE company_id=?',(company_id,))
+            connection.execute('DELETE FROM page_counts WHERE company_id=?',(company_id,))
+            connection.execute('DELETE FROM delivered WHERE company_id=?',(company_id,))
+            connection.execute('INSERT OR IGNORE INTO companies (company_id) VALUES (?)',(company_id,))
+            connection.execute('UPDATE companies SET done=1,plant_types=NULL WHERE company_id=?',(company_id,))
+
+    def get_plant_types(self,company_id):
+        """The trackable plant types found for a company
+
+            Returns:
+                {tuple} -- (plant types as yielded by Trackables.get_plant_types,{plant_type_id:high-water mark})
+                    or None if they haven't been found yet
+        """
+        with self.lock, self.connect() as connection:
+            row=connection.execute(
+                'SELECT plant_types,high_water_marks FROM companies WHERE company_id=? AND plant_types IS NOT NULL',
+                (company_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]),{int(key):value for key,value in json.loads(row[1]).items()}
+
+    def save_plant_types(self,company_id,plant_types,high_water_marks):
+        """Records the trackable plant types found for a company
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_types {list} -- plant types as yielded by Trackables.get_plant_types
+                high_water_marks {dict} -- {plant_type_id:high-water mark} of an incremental crawl
+        """
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO companies (company_id,plant_types,high_water_marks,done) VALUES (?,?,?,0)',
+                (company_id,json.dumps(plant_types),json.dumps(high_water_marks)))
+
+    def get_page_count(self,company_id,plant_type_id):
+        """Number of plant pages of a plant type, None if the first page hasn't been listed"""
+        with self.lock, self.connect() as connection:
+            row=connection.execute(
+                'SELECT pages FROM page_counts WHERE company_id=? AND plant_type_id=?',
+                (company_id,plant_type_id)).fetchone()
+        return row[0] if row else None
+
+    def save_page_count(self,company_id,plant_type_id,pages):
+        """Records the number of plant pages of a plant type"""
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO page_counts (company_id,plant_type_id,pages) VALUES (?,?,?)',
+                (company_id,plant_type_id,pages))
+
+    def get_pages(self,company_id,plant_type_id):
+        """The plant pages of a plant type that are done
+
+            Returns:
+                {dict} -- {page number:[plants as yielded by Trackables.get_equipment] or None if not kept}
+        """
+        with self.lock, self.connect() as connection:
+            rows=connection.execute(
+                'SELECT page,records FROM pages WHERE company_id=? AND plant_type_id=?',
+                (company_id,plant_type_id)).fetchall()
+        return {page:None if records is None else json.loads(records) for page,records in rows}
+
+    def save_page(self,company_id,plant_type_id,page,records=None):
+        """Marks a plant page done
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                page {integer} -- Page number
+                records {list} -- Plants found on the page, None to only mark it done
+        """
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO pages (company_id,plant_type_id,page,records) VALUES (?,?,?,?)',
+                (company_id,plant_type_id,page,None if records is None else json.dumps(records)))
+            connection.execute(
+                'DELETE FROM delivered WHERE company_id=? AND plant_type_id=? AND page=?',
+                (company_id,plant_type_id,page))
+
+    def get_delivered(self,company_id,plant_type_id,page):
+        """IDs of the plants already yielded from a plant page that isn't done
+
+            Returns:
+                {set} -- plant IDs
+        """
+        with self.lock, self.connect() as connection:
+            return {row[0] for row in connection.execute(
+                'SELECT plant_id FROM delivered WHERE company_id=? AND plant_type_id=? AND page=?',
+                (company_id,plant_type_id,page))}
+
+    def save_delivered(self,company_id,plant_type_id,page,plant_ids):
+        """Records plants yielded from a plant page that isn't done
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                page {integer} -- Page number
+                plant_ids {list} -- IDs of the plants yielded
+        """
+        with self.lock, self.connect() as connection:
+            connection.executemany(
+                'INSERT OR IGNORE INTO delivered (company_id,plant_type_id,page,plant_id) VALUES (?,?,?,?)',
+                [(company_id,plant_type_id,page,plant_id) for plant_id in plant_ids])
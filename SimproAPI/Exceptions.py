@@ -3,24 +3,36 @@ class Error(Exception):
     pass
 
 class SimproErrorHandler(object):
-    """Handles Simpro Exceptions"""
+    """Handles Simpro Exceptions
+
+        Notes:
+            The raised exception has the status_code of the response.
+    """
 
     def __init__(self,request):
-        self.status_code=request.status_code
+        #requests uses status_code while aiohttp uses status
+        self.status_code=getattr(request,'status_code',None) or getattr(request,'status',None)
         if self.status_code == 401:
-            raise SessionsUnauthorize()
+            error=SessionsUnauthorize()
         elif self.status_code == 404:
-            raise SessionsGetPlantOrEquipmentNotFoundError()
+            error=SessionsGetPlantOrEquipmentNotFoundError()
         elif self.status_code == 422:
-            raise SessionsGetPlantOrEquipmentNotFoundError()
-        
-            
+            error=SessionsGetPlantOrEquipmentNotFoundError()
+        elif self.status_code and self.status_code >= 400:
+            error=SessionsRequestError()
+        else:
+            return
+        error.status_code=self.status_code
+        raise error
+
 class SessionsUnauthorize(Error):
     """Exception raised when 401 is returned fom requests"""
 class SessionsGetPlantOrEquipmentNotFoundError(Error):
     """Exception raised when 404 is returned fom requests"""
 class SessionsPatchInvalidDataError(Error):
     """Exception raised when 422 is returned fom requests"""
+class SessionsRequestError(Error):
+    """Exception raised when any other error status is returned fom requests"""
 
 class InvalidCredentialError(Error):
     """Exception raised for errors related to Invalid Credentials."""
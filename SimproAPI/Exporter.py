@@ -0,0 +1,178 @@
+import contextlib
+import csv
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+class Exporter(object):
+    """Streams trackable equipment into flat CSV, JSON Lines, Arrow or Parquet files
+
+        Notes:
+            Writes one row per plant with a column per tracked custom field:
+                company_id, plant_type_id, plant_id, <custom field name>...
+            Records are written in batches of batch_size as they arrive, so nothing but the
+            current batch is held in memory. Pass it Trackables.get_companies_stream for the
+            lowest memory use, the output of Trackables.get_companies is accepted too.
+            Arrow and Parquet require the optional pyarrow dependency, pip install SimproAPI[parquet]
+    """
+    id_columns=('company_id','plant_type_id','plant_id')
+
+    def __init__(self,custom_field_names,batch_size=1000):
+        """
+            Arguments:
+                custom_field_names {list} -- Names of the tracked custom fields, one column each
+                batch_size {int} -- Number of rows written at once, also the Parquet row group size
+        """
+        self.custom_field_names=list(custom_field_names)
+        self.custom_field_set=set(self.custom_field_names)
+        self.batch_size=batch_size
+
+    @property
+    def columns(self):
+        return list(self.id_columns)+self.custom_field_names
+
+    def rows(self,records):
+        """Flattens records into rows
+
+            Arguments:
+                records {iterable} -- Records yielded by Trackables.get_companies_stream or companies
+                    yielded by Trackables.get_companies
+            Yields:
+                {dictionary} -- {company_id:, plant_type_id:, plant_id:, <custom field name>:value}
+        """
+        for record in records:
+            if 'trackable_plants' in record:
+                for plant_type in record['trackable_plants']:
+                    for plant in plant_type['trackable_plant']:
+                        yield self.row(record['id'],plant_type['id'],plant['id'],plant['custom_fields'])
+            else:
+                yield self.row(record['company_id'],record['plant_type_id'],record['plant_id'],record['custom_fields'])
+
+    def row(self,company_id,plant_type_id,plant_id,custom_fields):
+        results={'company_id':company_id,'plant_type_id':plant_type_id,'plant_id':plant_id}
+        results.update(dict.fromkeys(self.custom_field_names))
+        for custom_field in custom_fields:
+            if custom_field['name'] in self.custom_field_set:
+                results[custom_field['name']]=custom_field['value']
+        return results
+
+    def batches(self,records):
+        """Groups the rows of records into lists of batch_size rows"""
+        rows=self.rows(records)
+        while True:
+            batch=list(itertools.islice(rows,self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    @contextlib.contextmanager
+    def open_destination(destination,mode,**kwargs):
+        """Opens destination if it is a path, file objects are used as is and left open"""
+        if hasattr(destination,'write'):
+            yield destination
+        else:
+            with open(destination,mode,**kwargs) as output:
+                yield output
+
+    def write_csv(self,records,destination):
+        """Writes records to a CSV file
+
+            Arguments:
+                records {iterable} -- see rows
+                destination {string|file} -- Path or text file object to write to
+            Returns:
+                {int} -- Number of rows written
+        """
+        count=0
+        with self.open_destination(destination,'w',newline='',encoding='utf-8') as output:
+            writer=csv.DictWriter(output,fieldnames=self.columns)
+            writer.writeheader()
+            for batch in self.batches(records):
+                writer.writerows(batch)
+                output.flush()
+                count += len(batch)
+        logger.debug('Exported '+str(count)+' rows as CSV')
+        return count
+
+    def write_json_lines(self,records,destination):
+        """Writes records to a JSON Lines file, one json object per line
+
+            Arguments:
+                records {iterable} -- see rows
+                destination {string|file} -- Path or text file object to write to
+            Returns:
+                {int} -- Number of rows written
+        """
+        count=0
+        with self.open_destination(destination,'w',encoding='utf-8') as output:
+            for batch in self.batches(records):
+                output.write(''.join(json.dumps(row)+'\n' for row in batch))
+                output.flush()
+                count += len(batch)
+        logger.debug('Exported '+str(count)+' rows as JSON Lines')
+        return count
+
+    def arrow_schema(self):
+        """Arrow schema of the rows, IDs are int64 and custom field values strings"""
+        if pyarrow is None:
+            raise ImportError('Arrow and Parquet export requires pyarrow, install it with: pip install SimproAPI[parquet]')
+        return pyarrow.schema(
+            [(column,pyarrow.int64()) for column in self.id_columns]+
+            [(name,pyarrow.string()) for name in self.custom_field_names])
+
+    def record_batches(self,records,schema):
+        """Converts the rows of records into Arrow record batches of batch_size rows"""
+        for batch in self.batches(records):
+            columns=[[row[column] for row in batch] for column in self.id_columns]
+            columns+=[[None if row[name] is None else str(row[name]) for row in batch] for name in self.custom_field_names]
+            yield pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(column,type=field.type) for column,field in zip(columns,schema)],
+                schema=schema)
+
+    def write_parquet(self,records,destination,compression='snappy'):
+        """Writes records to a Parquet file, one row group per batch
+
+            Arguments:
+                records {iterable} -- see rows
+                destination {string|file} -- Path or binary file object to write to
+                compression {string} -- Parquet compression codec
+            Returns:
+                {int} -- Number of rows written
+        """
+        schema=self.arrow_schema()
+        count=0
+        with pyarrow.parquet.ParquetWriter(destination,schema,compression=compression) as writer:
+            for batch in self.record_batches(records,schema):
+                writer.write_table(pyarrow.Table.from_batches([batch],schema=schema))
+                count += batch.num_rows
+        logger.debug('Exported '+str(count)+' rows as Parquet')
+        return count
+
+    def write_arrow(self,records,destination):
+        """Writes records to an Arrow IPC file
+
+            Arguments:
+                records {iterable} -- see rows
+                destination {string|file} -- Path or binary file object to write to
+            Returns:
+                {int} -- Number of rows written
+        """
+        schema=self.arrow_schema()
+        count=0
+        with pyarrow.ipc.new_file(destination,schema) as writer:
+            for batch in self.record_batches(records,schema):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        logger.debug('Exported '+str(count)+' rows as Arrow')
+        return count
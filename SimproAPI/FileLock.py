@@ -0,0 +1,70 @@
+import threading
+import logging
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class FileLock(object):
+    """Exclusive lock shared between threads and processes on one host
+
+        Notes:
+            Uses fcntl.flock on posix and msvcrt.locking on windows.
+            The lock file is created if missing and never removed.
+    """
+    def __init__(self,path):
+        """
+            Arguments:
+                path {string} -- Location of the lock file
+        """
+        self.path=path
+        self.thread_lock=threading.RLock()
+        self.lock_file=None
+        self.depth=0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self,exec_types,exec_val,exc_tb):
+        self.release()
+
+    def acquire(self):
+        """Blocks until the lock is held by this thread"""
+        self.thread_lock.acquire()
+        self.depth += 1
+        if self.depth > 1:
+            return
+        try:
+            self.lock_file=open(self.path,'a+')
+            if fcntl:
+                fcntl.flock(self.lock_file.fileno(),fcntl.LOCK_EX)
+            else:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(),msvcrt.LK_LOCK,1)
+        except BaseException:
+            self.depth -= 1
+            if self.lock_file:
+                self.lock_file.close()
+                self.lock_file=None
+            self.thread_lock.release()
+            raise
+
+    def release(self):
+        """Releases the lock"""
+        self.depth -= 1
+        if self.depth == 0:
+            try:
+                if fcntl:
+                    fcntl.flock(self.lock_file.fileno(),fcntl.LOCK_UN)
+                else:
+                    self.lock_file.seek(0)
+                    msvcrt.locking(self.lock_file.fileno(),msvcrt.LK_UNLCK,1)
+            finally:
+                self.lock_file.close()
+                self.lock_file=None
+        self.thread_lock.release()
@@ -0,0 +1,78 @@
+import collections
+import threading
+import logging
+from .LatencyTracker import LatencyTracker
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class HedgePolicy(object):
+    """When Sessions sends a duplicate of a slow GET request, the first response wins
+
+        Notes:
+            A GET that hasn't answered within the percentile of recent latencies of its endpoint
+            is sent again. At most max_hedge_rate of the last window requests are hedged so the
+            extra load stays bounded. Nothing is hedged until an endpoint has enough latencies.
+    """
+    def __init__(self,percentile=95,max_hedge_rate=0.05,min_delay=0.01,window=1000,latency_tracker=None):
+        """
+            Arguments:
+                percentile {float} -- Latency percentile of the endpoint to wait before hedging
+                max_hedge_rate {float} -- Largest fraction of recent requests that may be hedged
+                min_delay {float} -- Shortest wait in seconds before hedging
+                window {int} -- Number of recent requests max_hedge_rate applies to
+                latency_tracker {LatencyTracker} -- Tracker of endpoint latencies, defaults to a new one.
+                    Sessions records the latency of every request, hedges included.
+        """
+        self.percentile=percentile
+        self.max_hedge_rate=max_hedge_rate
+        self.min_delay=min_delay
+        self.latency_tracker=LatencyTracker() if latency_tracker is None else latency_tracker
+        self.lock=threading.Lock()
+        self.recent=collections.deque(maxlen=window)
+        self.recent_hedges=0
+        self.counters={'requests':0,'hedges':0,'hedge_wins':0}
+
+    def delay(self,endpoint):
+        """Seconds to wait for a request to the endpoint before hedging it
+
+            Returns:
+                {float} -- Seconds, None if the endpoint doesn't have enough latencies yet
+        """
+        delay=self.latency_tracker.percentile(endpoint,self.percentile)
+        if delay is None:
+            return None
+        return max(delay,self.min_delay)
+
+    def request(self,hedged):
+        """Counts a request towards the hedge rate
+
+            Arguments:
+                hedged {bool} -- The request wants to be hedged
+            Returns:
+                {bool} -- The request may be hedged
+        """
+        with self.lock:
+            self.counters['requests'] += 1
+            allowed=hedged and self.recent_hedges < self.max_hedge_rate*(len(self.recent)+1)
+            if len(self.recent) == self.recent.maxlen and self.recent[0]:
+                self.recent_hedges -= 1
+            self.recent.append(allowed)
+            if allowed:
+                self.recent_hedges += 1
+                self.counters['hedges'] += 1
+            return allowed
+
+    def hedge_won(self):
+        """Counts a hedge that answered before the original request"""
+        with self.lock:
+            self.counters['hedge_wins'] += 1
+
+    def stats(self):
+        """Number of requests, hedges sent and hedges that answered first
+
+            Returns:
+                {dict} -- {requests:, hedges:, hedge_wins:}
+        """
+        with self.lock:
+            return dict(self.counters)
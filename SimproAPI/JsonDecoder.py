@@ -0,0 +1,134 @@
+import json
+import codecs
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+class JsonDecoder(object):
+    """Decodes json response bodies with the fastest backend installed
+
+        Notes:
+            Backends are tried in the order of JsonDecoder.backends: orjson, msgspec then the
+            stdlib json module. Simpro responses are UTF-8 so the raw bytes are decoded directly.
+            Every backend raises ValueError on invalid json.
+            iter_items parses a json array incrementally with the stdlib json module.
+    """
+    backends=('orjson','msgspec','json')
+
+    def __init__(self,backend=None):
+        """
+            Arguments:
+                backend {string} -- Backend to use, one of JsonDecoder.backends, defaults to the first installed
+        """
+        available=self.available()
+        if backend is None:
+            backend=available[0]
+        elif backend not in self.backends:
+            raise ValueError('Unknown json backend: '+str(backend))
+        elif backend not in available:
+            raise ImportError('json backend is not installed: '+str(backend))
+        self.backend=backend
+        if backend == 'orjson':
+            self.loads=orjson.loads
+        elif backend == 'msgspec':
+            self.loads=self.msgspec_loads
+        else:
+            self.loads=json.loads
+        logger.debug('Using json backend: '+backend)
+
+    @classmethod
+    def available(cls):
+        """Lists the installed backends in order of preference
+
+            Returns:
+                {list} -- names of the installed backends
+        """
+        installed={'orjson':orjson is not None,'msgspec':msgspec is not None,'json':True}
+        return [backend for backend in cls.backends if installed[backend]]
+
+    @staticmethod
+    def msgspec_loads(data):
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def decode(self,response):
+        """Decodes the body of a requests response
+
+            Arguments:
+                response {requests object} -- Response to decode
+            Returns:
+                Decoded json body
+        """
+        return self.loads(response.content)
+
+    def iter_items(self,chunks):
+        """Yields the items of a json array while it is being read
+
+            Notes:
+                Only the unparsed tail of the body is buffered, so memory stays at about one
+                chunk plus one item and the first item is available before the body is downloaded.
+
+            Arguments:
+                chunks {iterable} -- UTF-8 encoded bytes of the body, E.G. response.iter_content
+            Yields:
+                Decoded items of the array
+        """
+        raw_decode=json.JSONDecoder().raw_decode
+        decoder=codecs.getincrementaldecoder('utf-8')()
+        chunks=iter(chunks)
+        buffer=''
+        position=0
+        started=False
+        exhausted=False
+        while True:
+            #Skip whitespace and the separators between items
+            while position < len(buffer) and buffer[position] in ' \t\r\n,' and (started or buffer[position] != ','):
+                position += 1
+            if position < len(buffer):
+                if not started:
+                    if buffer[position] != '[':
+                        raise ValueError('Expected a json array at position '+str(position))
+                    started=True
+                    position += 1
+                    continue
+                if buffer[position] == ']':
+                    return
+                try:
+                    item,end=raw_decode(buffer,position)
+                except ValueError:
+                    if exhausted:
+                        raise
+                else:
+                    #Only accept an item once the , or ] after it has arrived, a number
+                    #like 1.5 split across chunks decodes as 1 from the first chunk alone
+                    following=end
+                    while following < len(buffer) and buffer[following] in ' \t\r\n':
+                        following += 1
+                    if following < len(buffer) and buffer[following] in ',]':
+                        yield item
+                        position=end
+                        continue
+                    if exhausted:
+                        raise ValueError('Expected , or ] at position '+str(following))
+            elif exhausted:
+                raise ValueError('Unexpected end of json array')
+            chunk=next(chunks,None)
+            if chunk is None:
+                exhausted=True
+                buffer=buffer[position:]+decoder.decode(b'',final=True)
+            else:
+                buffer=buffer[position:]+decoder.decode(chunk)
+            position=0
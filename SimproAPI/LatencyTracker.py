@@ -0,0 +1,54 @@
+import collections
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class LatencyTracker(object):
+    """Recent request latencies of each endpoint, used by HedgePolicy and TimeoutPolicy
+
+        Notes:
+            Keeps the last window latencies of every endpoint. Percentiles are None
+            until an endpoint has min_samples latencies.
+    """
+    def __init__(self,window=256,min_samples=20):
+        """
+            Arguments:
+                window {int} -- Number of recent latencies kept per endpoint
+                min_samples {int} -- Number of latencies needed before percentiles are given
+        """
+        self.window=window
+        self.min_samples=min_samples
+        self.lock=threading.Lock()
+        self.latencies={}
+
+    def record(self,endpoint,elapsed):
+        """Records the latency of a request
+
+            Arguments:
+                endpoint {string} -- Name of the endpoint method
+                elapsed {float} -- Seconds the request took
+        """
+        with self.lock:
+            latencies=self.latencies.get(endpoint)
+            if latencies is None:
+                latencies=self.latencies[endpoint]=collections.deque(maxlen=self.window)
+            latencies.append(elapsed)
+
+    def percentile(self,endpoint,percentile):
+        """Recent latency percentile of an endpoint
+
+            Arguments:
+                endpoint {string} -- Name of the endpoint method
+                percentile {float} -- Percentile between 0 and 100
+            Returns:
+                {float} -- Seconds, None if there are fewer than min_samples latencies
+        """
+        with self.lock:
+            latencies=self.latencies.get(endpoint)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            latencies=sorted(latencies)
+        index=min(len(latencies)-1,int(round(percentile/100.0*(len(latencies)-1))))
+        return latencies[index]
@@ -0,0 +1,55 @@
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class MatchIndex(object):
+    """Hash index of match data keyed on its serial field, used by Trackables.compare_equipment
+
+        Notes:
+            Build it once and reuse it across compare_equipment calls.
+            When several rows share a serial the last one wins.
+    """
+    def __init__(self,match_data,match_serial_field,normalize=None):
+        """
+            Arguments:
+                match_data {list} -- List containing a dictionary's to match simpro data against [{key:value}]
+                match_serial_field {string} -- key in match_data to index on
+                normalize {callable} -- Optional function applied to both sides of a match,
+                    E.G. MatchIndex.normalize_serial to ignore case and surrounding whitespace
+        """
+        self.match_serial_field=match_serial_field
+        self.normalize=normalize
+        self.index={}
+        for row in match_data:
+            serial=row.get(match_serial_field)
+            if serial is not None:
+                self.index[self.key(serial)]=row
+        logger.debug('Indexed '+str(len(self.index))+' match_data rows on: '+str(match_serial_field))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self,serial):
+        return self.get(serial) is not None
+
+    @staticmethod
+    def normalize_serial(serial):
+        """Normalizes a serial by stripping whitespace and ignoring case"""
+        return str(serial).strip().upper()
+
+    def key(self,serial):
+        """Index key of a serial"""
+        return self.normalize(serial) if self.normalize else serial
+
+    def get(self,serial):
+        """Finds the match_data row of a serial
+
+            Arguments:
+                serial -- serial to look up
+            Returns:
+                {dict} -- the matching row or None
+        """
+        if serial is None:
+            return None
+        return self.index.get(self.key(serial))
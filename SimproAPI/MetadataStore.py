@@ -0,0 +1,156 @@
+import sqlite3
+import contextlib
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class MetadataStore(object):
+    """Persistent sqlite store of plant types and their custom fields for each company
+
+        Notes:
+            Keeps the plant type -> custom field name -> custom field ID mapping so
+            Trackables.get_plant_types can find tracked fields without any API calls.
+            Use one store per Simpro build.
+    """
+    def __init__(self,save_location=None):
+        """
+            Arguments:
+                save_location {string} -- Location of the sqlite file, defaults to simpro_metadata.sqlite
+        """
+        self.save_location='simpro_metadata.sqlite' if not save_location else save_location
+        self.lock=threading.Lock()
+        with self.connect() as connection:
+            connection.executescript('''
+                CREATE TABLE IF NOT EXISTS companies (
+                    company_id INTEGER PRIMARY KEY,
+                    updated REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS plant_types (
+                    company_id INTEGER NOT NULL,
+                    plant_type_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (company_id,plant_type_id)
+                );
+                CREATE TABLE IF NOT EXISTS custom_fields (
+                    company_id INTEGER NOT NULL,
+                    plant_type_id INTEGER NOT NULL,
+                    custom_field_id INTEGER NOT NULL,
+                    name TEXT,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (company_id,plant_type_id,custom_field_id)
+                );
+                CREATE INDEX IF NOT EXISTS custom_fields_name ON custom_fields (company_id,name);
+                CREATE TABLE IF NOT EXISTS high_water_marks (
+                    company_id INTEGER NOT NULL,
+                    plant_type_id INTEGER NOT NULL,
+                    modified_since TEXT NOT NULL,
+                    PRIMARY KEY (company_id,plant_type_id)
+                );
+            ''')
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Opens a connection to the store, commits on success and always closes it"""
+        connection=sqlite3.connect(self.save_location,timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def updated(self,company_id):
+        """When the plant types of a company were last saved
+
+            Arguments:
+                company_id {integer} -- ID of the company
+            Returns:
+                {float} -- unix time or None if the company has never been saved
+        """
+        with self.lock, self.connect() as connection:
+            row=connection.execute(
+                'SELECT updated FROM companies WHERE company_id=?',
+                (company_id,)).fetchone()
+        return row[0] if row else None
+
+    def save_plant_types(self,company_id,plant_types):
+        """Replaces the stored plant types of a company
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_types {list} -- [{
+                    id: #ID of the plant type
+                    custom_fields:[{ #Every custom field of the plant type
+                        id:
+                        name:
+                    }]
+                }]
+        """
+        with self.lock, self.connect() as connection:
+            connection.execute('DELETE FROM plant_types WHERE company_id=?',(company_id,))
+            connection.execute('DELETE FROM custom_fields WHERE company_id=?',(company_id,))
+            connection.executemany(
+                'INSERT OR REPLACE INTO plant_types (company_id,plant_type_id,position) VALUES (?,?,?)',
+                [(company_id,plant_type['id'],position) for position,plant_type in enumerate(plant_types)])
+            connection.executemany(
+                'INSERT OR REPLACE INTO custom_fields (company_id,plant_type_id,custom_field_id,name,position) VALUES (?,?,?,?,?)',
+                [(company_id,plant_type['id'],custom_field['id'],custom_field['name'],position)
+                    for plant_type in plant_types
+                    for position,custom_field in enumerate(plant_type['custom_fields'])])
+            connection.execute(
+                'INSERT OR REPLACE INTO companies (company_id,updated) VALUES (?,?)',
+                (company_id,time.time()))
+        logger.debug('Saved '+str(len(plant_types))+' plant types for company_id: '+str(company_id))
+
+    def get_plant_types(self,company_id,custom_field_names):
+        """Finds the stored plant types of a company that have the named custom fields
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                custom_field_names {list} -- names of the custom fields to find the ID of
+            Returns:
+                {list} -- Same structure as yielded by Trackables.get_plant_types
+        """
+        custom_field_names=list(custom_field_names)
+        with self.lock, self.connect() as connection:
+            rows=connection.execute(
+                'SELECT custom_fields.plant_type_id,custom_field_id,name FROM custom_fields '
+                'JOIN plant_types USING (company_id,plant_type_id) '
+                'WHERE company_id=? AND name IN ({0}) '
+                'ORDER BY plant_types.position,custom_fields.position'.format(','.join('?'*len(custom_field_names))),
+                [company_id]+custom_field_names).fetchall()
+        results=[]
+        for plant_type_id,custom_field_id,name in rows:
+            if not results or results[-1]['id'] != plant_type_id:
+                results.append({'id':plant_type_id,'custom_fields':[]})
+            results[-1]['custom_fields'].append({'id':custom_field_id,'name':name})
+        return results
+
+    def get_high_water_mark(self,company_id,plant_type_id):
+        """When the plants of a plant type were last crawled, used by incremental crawls
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+            Returns:
+                {string} -- ISO 8601 date time or None if it has never been crawled
+        """
+        with self.lock, self.connect() as connection:
+            row=connection.execute(
+                'SELECT modified_since FROM high_water_marks WHERE company_id=? AND plant_type_id=?',
+                (company_id,plant_type_id)).fetchone()
+        return row[0] if row else None
+
+    def set_high_water_marks(self,company_id,high_water_marks):
+        """Records when the plants of plant types were crawled
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                high_water_marks {dict} -- {plant_type_id: ISO 8601 date time}
+        """
+        with self.lock, self.connect() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO high_water_marks (company_id,plant_type_id,modified_since) VALUES (?,?,?)',
+                [(company_id,plant_type_id,modified_since) for plant_type_id,modified_since in high_water_marks.items()])
@@ -0,0 +1,171 @@
+import bisect
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class Metrics(object):
+    """Per endpoint request metrics and instrumentation hooks for Sessions
+
+        Notes:
+            Pass an instance to Sessions or Trackables. When no instance is given
+            Sessions skips every metrics call, so there is no overhead.
+            Hooks are called on the requesting thread:
+                before(endpoint,method,url)
+                after(endpoint,method,url,response,elapsed)
+    """
+    #Upper bounds in seconds of the latency histogram buckets
+    buckets=(0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10)
+
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.before_hooks=[]
+        self.after_hooks=[]
+        self.endpoints={}
+
+    def add_hook(self,before=None,after=None):
+        """Registers callables to run before and/or after every request
+
+            Arguments:
+                before {callable} -- before(endpoint,method,url)
+                after {callable} -- after(endpoint,method,url,response,elapsed)
+        """
+        if before:
+            self.before_hooks.append(before)
+        if after:
+            self.after_hooks.append(after)
+
+    def endpoint(self,endpoint):
+        """Gets the counters of an endpoint, must be called holding the lock"""
+        counters=self.endpoints.get(endpoint)
+        if counters is None:
+            counters=self.endpoints[endpoint]={
+                'requests':0,
+                'status_codes':{},
+                'retries':0,
+                'errors':0,
+                'bytes':0,
+                'pages':0,
+                'decode_seconds':0.0,
+                'latency_buckets':[0]*(len(self.buckets)+1),
+                'latency_sum':0.0
+            }
+        return counters
+
+    def before_request(self,endpoint,method,url):
+        """Called by Sessions before sending a request"""
+        for hook in self.before_hooks:
+            hook(endpoint,method,url)
+
+    def after_request(self,endpoint,method,url,response,elapsed):
+        """Called by Sessions after a response has been received
+
+            Arguments:
+                endpoint {string} -- Name of the endpoint method
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                response {requests object} -- The response
+                elapsed {float} -- Seconds the request took, including urllib3 retries
+        """
+        retries=getattr(getattr(response.raw,'retries',None),'history',None) or ()
+        #Streamed bodies are counted by record_bytes once read
+        size=0 if getattr(response,'simpro_streamed',False) else len(response.content)
+        with self.lock:
+            counters=self.endpoint(endpoint)
+            counters['requests'] += 1
+            counters['status_codes'][response.status_code]=counters['status_codes'].get(response.status_code,0)+1
+            counters['retries'] += len(retries)
+            counters['bytes'] += size
+            counters['latency_buckets'][bisect.bisect_left(self.buckets,elapsed)] += 1
+            counters['latency_sum'] += elapsed
+        for hook in self.after_hooks:
+            hook(endpoint,method,url,response,elapsed)
+
+    def record_error(self,endpoint):
+        """Counts a request that raised instead of returning a response"""
+        with self.lock:
+            self.endpoint(endpoint)['errors'] += 1
+
+    def record_retry(self,endpoint):
+        """Counts a request retried by Sessions, E.G. after a 429 or a 401"""
+        with self.lock:
+            self.endpoint(endpoint)['retries'] += 1
+
+    def record_page(self,endpoint):
+        """Counts a page fetched by Sessions.get_pages"""
+        with self.lock:
+            self.endpoint(endpoint)['pages'] += 1
+
+    def record_bytes(self,endpoint,size):
+        """Adds the bytes of a streamed body once it has been read"""
+        with self.lock:
+            self.endpoint(endpoint)['bytes'] += size
+
+    def record_decode(self,endpoint,elapsed):
+        """Adds the seconds spent decoding a json body"""
+        with self.lock:
+            self.endpoint(endpoint)['decode_seconds'] += elapsed
+
+    def reset(self):
+        """Clears every counter"""
+        with self.lock:
+            self.endpoints={}
+
+    def snapshot(self):
+        """Returns a copy of every counter
+
+            Returns:
+                {dict} -- {endpoint:{
+                    requests:, status_codes:{status:count}, retries:, errors:, bytes:, pages:,
+                    decode_seconds:, latency_buckets:{le:cumulative count}, latency_sum:
+                }}
+        """
+        with self.lock:
+            results={}
+            for endpoint,counters in self.endpoints.items():
+                cumulative=0
+                latency_buckets={}
+                for bound,count in zip(self.buckets+('+Inf',),counters['latency_buckets']):
+                    cumulative += count
+                    latency_buckets[bound]=cumulative
+                results[endpoint]=dict(
+                    counters,
+                    status_codes=dict(counters['status_codes']),
+                    latency_buckets=latency_buckets)
+            return results
+
+    def to_prometheus(self,prefix='simpro'):
+        """Exports the counters in the Prometheus text format
+
+            Arguments:
+                prefix {string} -- Prefix of every metric name
+            Returns:
+                {string} -- Prometheus exposition text
+        """
+        snapshot=self.snapshot()
+        lines=[]
+        def metric(name,metric_type,help_text,samples):
+            lines.append('# HELP {0}_{1} {2}'.format(prefix,name,help_text))
+            lines.append('# TYPE {0}_{1} {2}'.format(prefix,name,metric_type))
+            for suffix,labels,value in samples:
+                label_text=','.join('{0}="{1}"'.format(k,str(v).replace('\\','\\\\').replace('"','\\"')) for k,v in labels)
+                lines.append('{0}_{1}{2}{{{3}}} {4}'.format(prefix,name,suffix,label_text,value))
+        metric('requests_total','counter','Responses received by endpoint and status code',
+            [('',(('endpoint',e),('status',status)),count)
+                for e,c in snapshot.items() for status,count in sorted(c['status_codes'].items())])
+        for name,key,help_text in (
+            ('request_retries_total','retries','Requests retried'),
+            ('request_errors_total','errors','Requests that raised instead of returning a response'),
+            ('response_bytes_total','bytes','Response body bytes received'),
+            ('pages_total','pages','Pages fetched by the paginator'),
+            ('json_decode_seconds_total','decode_seconds','Seconds spent decoding json bodies')):
+            metric(name,'counter',help_text,[('',(('endpoint',e),),c[key]) for e,c in snapshot.items()])
+        samples=[]
+        for e,c in snapshot.items():
+            for bound,count in c['latency_buckets'].items():
+                samples.append(('_bucket',(('endpoint',e),('le',bound)),count))
+            samples.append(('_sum',(('endpoint',e),),c['latency_sum']))
+            samples.append(('_count',(('endpoint',e),),c['latency_buckets']['+Inf']))
+        metric('request_duration_seconds','histogram','Request latency in seconds',samples)
+        return '\n'.join(lines)+'\n'
@@ -1,7 +1,8 @@
-import requests
 import logging
-from requests.adapters import HTTPAdapter
+import time
 from urllib3.util.retry import Retry
+from .Transport import Transport
+from .TimeoutPolicy import TimeoutPolicy
 from .Exceptions import (InvalidCredentialError, InvalidGrantRefreshTokenError,InvalidGrantTypeError, UndefinedFaultStringError)
 
 logger = logging.getLogger(__name__)
@@ -9,21 +10,33 @@ logger.debug('Importing Module : '+__name__)
 
 class OAuth2(object):
     """Class to manage Simpro API Sessions"""
-    def __init__(self,server):
+    def __init__(self,server,transport=None,timeout_policy=None):
+        """
+            Arguments:
+                server {string} -- Server URI
+                transport {Transport} -- Optional pooled transport shared with other classes, it is left open on exit
+                timeout_policy {TimeoutPolicy} -- Timeouts of the token request, defaults to timeouts learnt from recent latencies
+        """
         self.server=server
-        self.session=requests.Session()
-        self.session.mount(
-            'https://',
-            HTTPAdapter(
-                max_retries=Retry(
-                    total=10,
-                    backoff_factor=0.5)))
+        self.timeout_policy=TimeoutPolicy() if timeout_policy is None else timeout_policy
+        #Only close the transport if this class created it
+        self.owns_transport=transport is None
+        self.transport=Transport(
+            max_retries=Retry(
+                total=10,
+                backoff_factor=0.5)) if transport is None else transport
+        self.session=self.transport.session
 
     def __enter__(self):
         return self
     
     def __exit__(self,exec_types,exec_val,exc_tb):
-        self.session.close()
+        self.close()
+
+    def close(self):
+        """Closes the transport if it isn't shared"""
+        if self.owns_transport:
+            self.transport.close()
 
     def post(self,client_id,client_secret,username=None,password=None,refresh_token=None):
         """post an authorization token
@@ -57,10 +70,13 @@ class OAuth2(object):
 
         uri = '/oauth2/token'
         url = self.server + uri
-        results = self.session.post(
+        start=time.perf_counter()
+        results = self.transport.request(
+            'POST',
             url,
             data=data,
-            timeout=5).json()
+            timeout=self.timeout_policy.timeout('oauth2_token')).json()
+        self.timeout_policy.latency_tracker.record('oauth2_token',time.perf_counter()-start)
         if results.get('error'):
             if results.get('error_description') == 'Invalid username and password combination':
                 raise CredentialError()
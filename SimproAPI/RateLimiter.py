@@ -0,0 +1,112 @@
+import json
+import time
+import threading
+import logging
+from .FileLock import FileLock
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class RateLimiter(object):
+    """Token bucket rate limiter that can be shared between Sessions
+
+        Notes:
+            Share one instance between Sessions and threads in a process.
+            To share it between processes on one host give every process the same state_file,
+            the bucket is then kept in that file under a file lock.
+            When the server rate limits a request (429 / Retry-After) penalize is called,
+            which pauses every user of the bucket and halves the rate. The rate then
+            recovers linearly back to the configured rate over recovery_time seconds.
+    """
+    def __init__(self,rate=10,burst=None,state_file=None,min_rate=1,recovery_time=30):
+        """
+            Arguments:
+                rate {float} -- Sustained requests per second, above 0
+                burst {int} -- Maximum number of requests that can be sent at once, defaults to rate
+                state_file {string} -- File to keep the bucket in when sharing it between processes
+                min_rate {float} -- Lowest rate a penalty can reduce the bucket to, above 0
+                recovery_time {float} -- Seconds taken to recover from min_rate back to rate
+        """
+        #acquire divides by the current rate, which penalties lower to min_rate
+        if rate <= 0:
+            raise ValueError('rate must be above 0: '+str(rate))
+        if min_rate <= 0:
+            raise ValueError('min_rate must be above 0: '+str(min_rate))
+        self.rate=float(rate)
+        self.burst=float(burst if burst else max(rate,1))
+        self.min_rate=float(min(min_rate,rate))
+        self.recovery_time=recovery_time
+        self.state_file=state_file
+        self.lock=FileLock(state_file+'.lock') if state_file else threading.Lock()
+        self.state=self.new_state()
+
+    def new_state(self):
+        """Returns a full bucket"""
+        return {
+            'tokens':self.burst,
+            'current_rate':self.rate,
+            'updated':time.time(),
+            'blocked_until':0.0
+        }
+
+    def load_state(self):
+        """Reads the bucket, from the state_file when sharing between processes"""
+        if not self.state_file:
+            return self.state
+        try:
+            with open(self.state_file,'r') as state_file:
+                return json.loads(state_file.read())
+        except (FileNotFoundError,ValueError):
+            return self.new_state()
+
+    def save_state(self,state):
+        """Writes the bucket, to the state_file when sharing between processes"""
+        self.state=state
+        if self.state_file:
+            with open(self.state_file,'w') as state_file:
+                state_file.write(json.dumps(state))
+
+    def refill(self,state,now):
+        """Adds the tokens and rate recovered since the last update"""
+        elapsed=max(now-state['updated'],0)
+        if state['current_rate'] < self.rate:
+            state['current_rate']=min(
+                self.rate,
+                state['current_rate']+elapsed*(self.rate/self.recovery_time))
+        state['tokens']=min(self.burst,state['tokens']+elapsed*state['current_rate'])
+        state['updated']=now
+
+    def acquire(self):
+        """Blocks until a request may be sent"""
+        while True:
+            with self.lock:
+                state=self.load_state()
+                now=time.time()
+                self.refill(state,now)
+                if state['blocked_until'] > now:
+                    wait=state['blocked_until']-now
+                elif state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    self.save_state(state)
+                    return
+                else:
+                    wait=(1-state['tokens'])/state['current_rate']
+                self.save_state(state)
+            time.sleep(wait)
+
+    def penalize(self,retry_after=None):
+        """Slows every user of the bucket down after the server rate limited a request
+
+            Arguments:
+                retry_after {float} -- Seconds the server asked to wait, defaults to one token interval
+        """
+        with self.lock:
+            state=self.load_state()
+            now=time.time()
+            self.refill(state,now)
+            retry_after=retry_after if retry_after is not None else 1/self.rate
+            state['blocked_until']=max(state['blocked_until'],now+retry_after)
+            state['current_rate']=max(self.min_rate,state['current_rate']/2)
+            state['tokens']=0
+            self.save_state(state)
+        logger.warning('Rate limited, pausing for '+str(retry_after)+'s at '+str(state['current_rate'])+' requests/s')
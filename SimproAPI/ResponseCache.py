@@ -0,0 +1,127 @@
+import time
+import threading
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class ResponseCache(object):
+    """LRU cache of GET responses with a TTL for each Sessions endpoint
+
+        Notes:
+            Fresh entries are returned without a request. Stale entries that carry an
+            ETag or Last-Modified header are revalidated with If-None-Match / If-Modified-Since,
+            a 304 then refreshes the entry instead of downloading the body again.
+            Endpoints without a TTL are not cached.
+    """
+    default_ttl={
+        'companies_get_all':3600,
+        'companies_get_specific':3600,
+        'plant_type_get_all':3600,
+        'plant_type_custom_fields_get_all':3600
+    }
+
+    def __init__(self,max_entries=1024,ttl=None,fallback_ttl=None):
+        """
+            Arguments:
+                max_entries {int} -- Number of responses kept before the least recently used is evicted
+                ttl {dict} -- Seconds an entry stays fresh by endpoint name, E.G. {'plant_type_get_all':3600}
+                    merged over ResponseCache.default_ttl. 0 always revalidates.
+                fallback_ttl {int} -- TTL of endpoints missing from ttl and ResponseCache.default_ttl, None to not cache them
+        """
+        self.max_entries=max_entries
+        self.ttl=dict(self.default_ttl)
+        self.ttl.update(ttl or {})
+        self.fallback_ttl=fallback_ttl
+        self.entries=collections.OrderedDict()
+        self.lock=threading.Lock()
+        self.hits=0
+        self.misses=0
+        self.revalidated=0
+        self.evictions=0
+
+    def endpoint_ttl(self,endpoint):
+        """TTL of an endpoint or None when it isn't cached"""
+        return self.ttl.get(endpoint,self.fallback_ttl)
+
+    @staticmethod
+    def key(url,params,auth=None):
+        """Cache key of a request
+
+            Arguments:
+                url {string} -- Full url of the request
+                params {dict} -- Params/query options of the request
+                auth -- Who the request is authorized as, see Sessions.auth_identity
+        """
+        return (url,tuple(sorted((str(k),str(v)) for k,v in (params or {}).items())),auth)
+
+    def get(self,key):
+        """Gets an entry and marks it as recently used
+
+            Returns:
+                {dict} -- {response:,expires:} or None
+        """
+        with self.lock:
+            entry=self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self,key,response,ttl):
+        """Stores a response, evicting the least recently used entry when full"""
+        with self.lock:
+            self.entries[key]={
+                'response':response,
+                'expires':time.monotonic()+ttl
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh(self,key,ttl):
+        """Marks an entry as fresh again after a 304"""
+        with self.lock:
+            entry=self.entries.get(key)
+            if entry is not None:
+                entry['expires']=time.monotonic()+ttl
+            self.revalidated += 1
+
+    def record(self,hit):
+        """Counts a hit or a miss"""
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        """Removes every entry"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Returns the cache counters
+
+            Returns:
+                {dict} -- {hits:,misses:,revalidated:,evictions:,entries:}
+        """
+        with self.lock:
+            return {
+                'hits':self.hits,
+                'misses':self.misses,
+                'revalidated':self.revalidated,
+                'evictions':self.evictions,
+                'entries':len(self.entries)
+            }
+
+    @staticmethod
+    def validators(response):
+        """Conditional request headers to revalidate a cached response"""
+        headers={}
+        if response.headers.get('ETag'):
+            headers['If-None-Match']=response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            headers['If-Modified-Since']=response.headers['Last-Modified']
+        return headers
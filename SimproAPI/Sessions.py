@@ -1,67 +1,584 @@
 import requests
+import urllib3
 import logging
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import collections
+import datetime
+import email.utils
+import time
+import itertools
+import concurrent.futures
 from .Exceptions import SimproErrorHandler
+from .Transport import Transport
+from .TokenProvider import TokenProvider
+from .JsonDecoder import JsonDecoder
+from .TimeoutPolicy import TimeoutPolicy
 
 logger = logging.getLogger(__name__)
 logger.debug('Importing Module : '+__name__)
 
 class Sessions(object):
     """Class to manage Simpro API Sessions"""
-    def __init__(self,server,token):
+    def __init__(self,server,token,page_size=250,max_page_workers=4,pool_maxsize=10,rate_limiter=None,rate_limit_retries=5,cache=None,transport=None,metrics=None,json_decoder=None,single_flight=None,hedge_policy=None,timeout_policy=None):
+        """
+            Arguments:
+                server {string} -- Server URI
+                token {string|TokenProvider} -- Token value to be used for accessing the API,
+                    or a TokenProvider to read the current token for each request and refresh it on a 401
+                page_size {int} -- Number of items requested per page, 250 is the most the API allows
+                max_page_workers {int} -- Maximum number of pages fetched concurrently by get_pages
+                pool_maxsize {int} -- Number of keep-alive connections kept open when no transport is given,
+                    size it to the number of threads sharing the session
+                rate_limiter {RateLimiter} -- Optional rate limiter shared with other Sessions
+                rate_limit_retries {int} -- Number of times a rate limited (429) request is retried
+                cache {ResponseCache} -- Optional cache of GET responses
+                transport {Transport} -- Optional pooled transport shared with other classes, it is left open on exit
+                metrics {Metrics} -- Optional per endpoint request metrics and hooks
+                json_decoder {JsonDecoder} -- Decoder of response bodies, defaults to the fastest backend installed
+                single_flight {SingleFlight} -- Optional coalescing of identical in-flight GET requests, can be shared with other Sessions
+                hedge_policy {HedgePolicy} -- Optional hedging of slow GET requests with a duplicate request
+                timeout_policy {TimeoutPolicy} -- Timeouts of each endpoint, defaults to timeouts learnt from recent latencies
+        """
         self.server=server
         self.token=token
-        self.session=requests.Session()
-        self.headers={'Authorization': 'Bearer {0}'.format(token),'Accept':'application/json'}
-        self.session.headers.update(self.headers)
-        self.session.mount(
-            'https://',
-            HTTPAdapter(
-                max_retries=Retry(
-                    total=5,
-                    backoff_factor=0.5)))
+        self.page_size=page_size
+        self.max_page_workers=max_page_workers
+        self.rate_limiter=rate_limiter
+        self.rate_limit_retries=rate_limit_retries
+        self.cache=cache
+        self.metrics=metrics
+        self.json_decoder=JsonDecoder() if json_decoder is None else json_decoder
+        self.single_flight=single_flight
+        self.hedge_policy=hedge_policy
+        self.timeout_policy=TimeoutPolicy() if timeout_policy is None else timeout_policy
+        #Seconds the server's clock is ahead of ours, learnt from the Date header of responses
+        self.server_clock_offset=None
+        #Every latency tracker to record into, once each when the policies share one
+        self.latency_trackers=[self.timeout_policy.latency_tracker]
+        if hedge_policy is not None and hedge_policy.latency_tracker is not self.timeout_policy.latency_tracker:
+            self.latency_trackers.append(hedge_policy.latency_tracker)
+        #Only close the transport if this class created it
+        self.owns_transport=transport is None
+        self.transport=Transport(pool_maxsize=pool_maxsize) if transport is None else transport
+        #Runs the original and hedge requests so the caller can wait on whichever answers first,
+        #sized from the transport's pool as that is what bounds the requests in flight
+        self.hedge_executor=concurrent.futures.ThreadPoolExecutor(max_workers=self.transport.pool_maxsize*2) if hedge_policy is not None else None
+        self.session=self.transport.session
+        self.token_provider=token if isinstance(token,TokenProvider) else None
+        self.headers={'Accept':'application/json'}
+        if self.token_provider is None:
+            self.headers['Authorization']='Bearer {0}'.format(token)
 
     def __enter__(self):
         return self
     
     def __exit__(self,exec_types,exec_val,exc_tb):
-        self.session.close()
+        self.close()
+
+    def close(self):
+        """Closes the transport if it isn't shared"""
+        if self.hedge_executor is not None:
+            self.hedge_executor.shutdown(wait=False)
+        if self.owns_transport:
+            self.transport.close()
+
+    def request(self,method,url,endpoint=None,**kwargs):
+        """Sends a request, every endpoint method goes through here
+
+            Notes:
+                The timeout comes from the timeout_policy unless one is passed.
+                With a single_flight, concurrent identical GET requests share one response.
+                Streamed requests are never shared as their body can only be read once.
 
-    def companies_get_all(self,params={}):
-        """Gets a list of all companies in the client's build.
-            
             Arguments:
-                params {dict} -- Params/query options to pass to the request
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                endpoint {string} -- Name of the endpoint method making the request
+                kwargs -- Passed through to requests
             Returns:
                 requests object
         """
+        kwargs['timeout']=self.timeout_policy.timeout(endpoint,kwargs.get('timeout'))
+        if self.single_flight is not None and method == 'GET' and not kwargs.get('stream'):
+            key=self.single_flight.key(url,kwargs.get('params'),self.auth_identity())
+            return self.single_flight.do(key,self.dispatch,method,url,endpoint,**kwargs)
+        return self.dispatch(method,url,endpoint,**kwargs)
 
-        uri = '/api/v1.0/companies/'      
-        url = self.server + uri
-        results = self.session.get(
-            url,            
-            params=params,
-            timeout=5)
+    def auth_identity(self):
+        """Who requests are authorized as, part of the single_flight and cache keys
+
+            Notes:
+                Keeps Sessions with different credentials that share a single_flight or cache
+                from receiving each other's responses. With a token_provider it is the client and
+                user of its TokenManager, so entries outlive a token refresh.
+
+            Returns:
+                {tuple|string} -- (server, client_id, username) or the Authorization header
+        """
+        if self.token_provider is not None:
+            token_manager=self.token_provider.token_manager
+            return (token_manager.server,token_manager.client_id,token_manager.username)
+        return self.headers.get('Authorization')
+
+    def dispatch(self,method,url,endpoint=None,**kwargs):
+        """Sends a request through the cache or straight to send
+
+            Notes:
+                GET requests to endpoints with a TTL in the cache are answered from it,
+                unless they are streamed.
+
+            Arguments:
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                endpoint {string} -- Name of the endpoint method making the request
+                kwargs -- Passed through to requests
+            Returns:
+                requests object
+        """
+        if self.cache is not None and method == 'GET' and not kwargs.get('stream'):
+            ttl=self.cache.endpoint_ttl(endpoint)
+            if ttl is not None:
+                return self.cached_request(url,ttl,endpoint,**kwargs)
+        return self.send(method,url,endpoint,**kwargs)
+
+    def cached_request(self,url,ttl,endpoint=None,**kwargs):
+        """Sends a GET request through the cache
+
+            Notes:
+                Stale entries are revalidated with If-None-Match / If-Modified-Since when the
+                cached response has an ETag or Last-Modified header.
+
+            Arguments:
+                url {string} -- Full url of the request
+                ttl {int} -- Seconds a response stays fresh
+                endpoint {string} -- Name of the endpoint method making the request
+                kwargs -- Passed through to requests
+            Returns:
+                requests object
+        """
+        key=self.cache.key(url,kwargs.get('params'),self.auth_identity())
+        entry=self.cache.get(key)
+        if entry is not None and entry['expires'] > time.monotonic():
+            self.cache.record(hit=True)
+            return entry['response']
+        validators=self.cache.validators(entry['response']) if entry is not None else {}
+        if validators:
+            kwargs['headers']=dict(kwargs.get('headers') or {},**validators)
+        results=self.send('GET',url,endpoint,**kwargs)
+        if results.status_code == 304 and entry is not None:
+            logger.debug('Revalidated cached response: '+url)
+            self.cache.refresh(key,ttl)
+            self.cache.record(hit=True)
+            return entry['response']
+        self.cache.record(hit=False)
         if results.ok:
+            self.cache.put(key,results,ttl)
+        return results
+
+    def send(self,method,url,endpoint=None,**kwargs):
+        """Sends a request through the session
+
+            Notes:
+                Waits on the rate_limiter when one is set. A 429 response or a
+                Retry-After header penalizes the rate limiter, or sleeps when there is none,
+                and the request is retried up to rate_limit_retries times.
+                With a token_provider a 401 refreshes the token and the request is retried once.
+                The response is tagged with the endpoint so json() can attribute decode time to it.
+
+            Arguments:
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                endpoint {string} -- Name of the endpoint method making the request
+                kwargs -- Passed through to requests
+            Returns:
+                requests object
+        """
+        headers=dict(self.headers,**(kwargs.pop('headers',None) or {}))
+        attempt=0
+        token_refreshed=False
+        while True:
+            if self.token_provider:
+                token=self.token_provider.get_token()
+                headers['Authorization']='Bearer {0}'.format(token)
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            if self.hedge_policy is not None and method == 'GET':
+                results=self.hedged_request(method,url,endpoint,headers,**kwargs)
+            else:
+                results=self.timed_request(method,url,endpoint,headers,**kwargs)
+            results.simpro_endpoint=endpoint
+            self.observe_server_date(results)
+            if results.status_code == 401 and self.token_provider and not token_refreshed:
+                token_refreshed=True
+                logger.debug('Unauthorized '+method+' '+url+' refreshing token')
+                self.token_provider.refresh(token)
+                results.close()
+                if self.metrics is not None:
+                    self.metrics.record_retry(endpoint)
+                continue
+            retry_after=self.retry_after(results)
+            if (results.status_code == 429 or retry_after is not None) and attempt < self.rate_limit_retries:
+                attempt += 1
+                logger.debug('Rate limited '+method+' '+url+' status: '+str(results.status_code)+' retry after: '+str(retry_after))
+                results.close()
+                if self.rate_limiter:
+                    self.rate_limiter.penalize(retry_after)
+                else:
+                    time.sleep(retry_after if retry_after is not None else 0.5 * (2 ** (attempt - 1)))
+                if self.metrics is not None:
+                    self.metrics.record_retry(endpoint)
+                continue
             return results
+
+    def hedged_request(self,method,url,endpoint,headers,**kwargs):
+        """Sends a GET request and a duplicate if it is slower than the hedge_policy delay
+
+            Notes:
+                The first successful response is returned and the other is closed once it arrives.
+                If both fail the error of the original request is raised.
+
+            Arguments:
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                endpoint {string} -- Name of the endpoint method making the request
+                headers {dict} -- Headers of the request
+                kwargs -- Passed through to requests
+            Returns:
+                requests object
+        """
+        delay=self.hedge_policy.delay(endpoint)
+        if delay is None:
+            self.hedge_policy.request(False)
+            return self.timed_request(method,url,endpoint,headers,**kwargs)
+        original=self.hedge_executor.submit(self.timed_request,method,url,endpoint,headers,**kwargs)
+        done,_=concurrent.futures.wait([original],timeout=delay)
+        if not self.hedge_policy.request(not done):
+            return original.result()
+        logger.debug('Hedging '+method+' '+url+' after '+str(round(delay,3))+'s')
+        hedge=self.hedge_executor.submit(self.hedge,method,url,endpoint,dict(headers),**kwargs)
+        futures=[original,hedge]
+        pending=set(futures)
+        winner=None
+        while pending and winner is None:
+            done,pending=concurrent.futures.wait(pending,return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in futures:
+                if future in done and future.exception() is None:
+                    winner=future
+                    break
+        if winner is None:
+            return original.result()
+        if winner is hedge:
+            self.hedge_policy.hedge_won()
+        for future in futures:
+            if future is not winner:
+                future.add_done_callback(self.close_response)
+        return winner.result()
+
+    def hedge(self,method,url,endpoint,headers,**kwargs):
+        """Sends the duplicate of a hedged request, waiting on the rate_limiter first"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        return self.timed_request(method,url,endpoint,headers,**kwargs)
+
+    def timed_request(self,method,url,endpoint,headers,**kwargs):
+        """Sends a request over the transport and records its latency in the latency trackers
+
+            Notes:
+                Latencies are of a single attempt. The time of a request the transport's urllib3
+                retries sent more than once includes the failed attempts and the backoff between
+                them, so it isn't recorded.
+                A request that failed on a read timeout is recorded as taking the read timeout,
+                so the learnt timeout of an endpoint grows when it keeps timing out.
+        """
+        start=time.perf_counter()
+        try:
+            if self.metrics is not None:
+                results=self.measured_request(method,url,endpoint,headers,**kwargs)
+            else:
+                results=self.transport_request(method,url,headers,**kwargs)
+        except requests.exceptions.RequestException as e:
+            timeout=kwargs.get('timeout')
+            read_timeout=timeout[1] if isinstance(timeout,tuple) else timeout
+            if read_timeout is not None and self.read_timed_out(e):
+                self.record_latency(endpoint,read_timeout)
+            raise
+        if self.attempts(results) == 1:
+            self.record_latency(endpoint,time.perf_counter()-start)
+        return results
+
+    @staticmethod
+    def attempts(results):
+        """Number of attempts urllib3 made to get a response, 1 when it wasn't retried"""
+        retries=getattr(getattr(results,'raw',None),'retries',None)
+        history=getattr(retries,'history',None)
+        return 1+len(history) if history else 1
+
+    @staticmethod
+    def read_timed_out(exception):
+        """Whether a request failed on a read timeout, also once urllib3 gave up retrying one"""
+        if isinstance(exception,requests.exceptions.ReadTimeout):
+            return True
+        reason=getattr(exception.args[0],'reason',None) if exception.args else None
+        return isinstance(reason,urllib3.exceptions.ReadTimeoutError)
+
+    def transport_request(self,method,url,headers,**kwargs):
+        """Sends a request over the transport, marking streamed responses so iter_items closes them"""
+        results=self.transport.request(method,url,headers=headers,**kwargs)
+        if kwargs.get('stream'):
+            results.simpro_streamed=True
+        return results
+
+    def record_latency(self,endpoint,elapsed):
+        """Records the latency of a request in every latency tracker"""
+        for latency_tracker in self.latency_trackers:
+            latency_tracker.record(endpoint,elapsed)
+
+    @staticmethod
+    def close_response(future):
+        """Closes the response of a request that lost a hedge or was fetched ahead and abandoned"""
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def measured_request(self,method,url,endpoint,headers,**kwargs):
+        """Sends a request over the transport and records it in metrics
+
+            Arguments:
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                endpoint {string} -- Name of the endpoint method making the request
+                headers {dict} -- Headers of the request
+                kwargs -- Passed through to requests
+            Returns:
+                requests object
+        """
+        self.metrics.before_request(endpoint,method,url)
+        start=time.perf_counter()
+        try:
+            results=self.transport_request(method,url,headers,**kwargs)
+        except Exception:
+            self.metrics.record_error(endpoint)
+            raise
+        self.metrics.after_request(endpoint,method,url,results,time.perf_counter()-start)
+        return results
+
+    def json(self,response):
+        """Decodes the json body of a response
+
+            Notes:
+                Use this instead of response.json(), it decodes with json_decoder
+                and records decode time in metrics.
+                Every call decodes a new object, so callers sharing a response through single_flight
+                or the cache can change what they get without affecting each other.
+
+            Arguments:
+                response {requests object} -- Response returned by an endpoint method
+            Returns:
+                Decoded json body
+        """
+        return self.decode(response)
+
+    def decode(self,response):
+        """Decodes the json body of a response with json_decoder, timed when there are metrics"""
+        if self.metrics is None:
+            return self.json_decoder.decode(response)
+        start=time.perf_counter()
+        results=self.json_decoder.decode(response)
+        self.metrics.record_decode(getattr(response,'simpro_endpoint',None),time.perf_counter()-start)
+        return results
+
+    def iter_items(self,response,chunk_size=65536):
+        """Yields the items of a json array body while it is read
+
+            Notes:
+                Pass a response of a list endpoint called with stream=True, the body is then parsed
+                as it downloads instead of being buffered whole, lowering peak memory on large pages.
+                A streamed response is closed once its items are exhausted or the generator is closed,
+                its bytes are counted in metrics then. Decode time isn't recorded as it includes the download.
+                Responses that were read already work too.
+
+            Arguments:
+                response {requests object} -- Response returned by an endpoint method
+                chunk_size {int} -- Bytes read from the body at a time
+            Yields:
+                Items of the json array
+        """
+        streamed=getattr(response,'simpro_streamed',False)
+        size=0
+        chunks=response.iter_content(chunk_size)
+        if self.metrics is not None and streamed:
+            def counted(chunks):
+                nonlocal size
+                for chunk in chunks:
+                    size += len(chunk)
+                    yield chunk
+            chunks=counted(chunks)
+        try:
+            yield from self.json_decoder.iter_items(chunks)
+        finally:
+            if streamed:
+                if self.metrics is not None:
+                    self.metrics.record_bytes(getattr(response,'simpro_endpoint',None),size)
+                response.close()
+
+    def observe_server_date(self,results):
+        """Learns the offset of the server's clock from the Date header of a response"""
+        date=results.headers.get('Date')
+        if not date:
+            return
+        try:
+            server_date=email.utils.parsedate_to_datetime(date)
+        except (TypeError,ValueError):
+            return
+        if server_date.tzinfo is not None:
+            self.server_clock_offset=(server_date-datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+    def server_time(self):
+        """Current time on the server's clock
+
+            Notes:
+                Uses the clock offset learnt from the Date header of the last response,
+                the local clock until a response has been received.
+
+            Returns:
+                {datetime} -- timezone aware UTC date time
+        """
+        now=datetime.datetime.now(datetime.timezone.utc)
+        if self.server_clock_offset is None:
+            return now
+        return now+datetime.timedelta(seconds=self.server_clock_offset)
+
+    @staticmethod
+    def retry_after(results):
+        """Reads the Retry-After header of a response
+
+            Arguments:
+                results {requests object} -- response to read, aiohttp responses are accepted too
+            Returns:
+                {float} -- seconds to wait or None when the header is missing or invalid
+        """
+        #requests uses status_code while aiohttp uses status
+        status_code=getattr(results,'status_code',None) or getattr(results,'status',None)
+        retry_after=results.headers.get('Retry-After')
+        if not retry_after or status_code < 400:
+            return None
+        try:
+            return max(float(retry_after),0)
+        except ValueError:
+            pass
+        try:
+            retry_date=email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError,ValueError):
+            return None
+        return max((retry_date-datetime.datetime.now(datetime.timezone.utc)).total_seconds(),0)
+
+    def get_pages(self,url,params={},timeout=None,endpoint=None,stream=False):
+        """Gets every page of a list endpoint
+
+            Notes:
+                The first page is fetched on its own to learn the Result-Pages header,
+                the remaining pages are then fetched concurrently, at most max_page_workers at once.
+                Pages are always yielded in order.
+                Streamed pages are fetched ahead with their bodies unread, read them with iter_items.
+
+            Arguments:
+                url {string} -- Full url of the list endpoint
+                params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Timeout of each page request, defaults to the timeout_policy
+                endpoint {string} -- Name of the endpoint method making the request
+                stream {bool} -- Leave the body of each page unread, see iter_items
+            Yields:
+                requests object
+        """
+        params=dict(params)
+        params.setdefault('pageSize',self.page_size)
+        first_page=self.get_page(url,params,1,timeout,endpoint,stream)
+        yield first_page
+        last_page=int(first_page.headers.get('Result-Pages') or 1)
+        if last_page < 2:
+            return
+        logger.debug('Fetching '+str(last_page-1)+' remaining pages of '+url)
+        pages=iter(range(2,last_page+1))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_page_workers) as executor:
+            #Keep a bounded window of pages in flight so unread pages don't pile up
+            window=collections.deque(
+                executor.submit(self.get_page,url,params,page_number,timeout,endpoint,stream)
+                for page_number in itertools.islice(pages,self.max_page_workers))
+            try:
+                while window:
+                    page=window.popleft().result()
+                    for page_number in itertools.islice(pages,1):
+                        window.append(executor.submit(self.get_page,url,params,page_number,timeout,endpoint,stream))
+                    yield page
+            finally:
+                for future in window:
+                    #Pages fetched ahead of an abandoned stream still hold a pooled connection
+                    if not future.cancel() and stream:
+                        future.add_done_callback(self.close_response)
+
+    def get_page(self,url,params,page_number,timeout=None,endpoint=None,stream=False):
+        """Gets a single page of a list endpoint
+
+            Arguments:
+                url {string} -- Full url of the list endpoint
+                params {dict} -- Params/query options to pass to the request
+                page_number {int} -- Page to get
+                timeout {float|tuple} -- Timeout of the request, defaults to the timeout_policy
+                endpoint {string} -- Name of the endpoint method making the request
+                stream {bool} -- Leave the body unread, see iter_items
+            Returns:
+                requests object
+        """
+        params=dict(params,page=page_number)
+        page=self.request(
+            'GET',
+            url,
+            endpoint=endpoint,
+            params=params,
+            timeout=timeout,
+            stream=stream
+            )
+        if page.ok:
+            if self.metrics is not None:
+                self.metrics.record_page(endpoint)
+            return page
         else:
-            SimproErrorHandler(results)
+            SimproErrorHandler(page)
+
+    def companies_get_all(self,params={},timeout=None,stream=False):
+        """Gets a list of all companies in the client's build.
+
+            Notes:
+                Can Handle Pagination
+                Since 0.2.0 this yields a response per page instead of returning one response
+
+            Arguments:
+                params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
+                stream {bool} -- Leave the body unread so its items can be parsed while it downloads, see iter_items
+            Yields:
+                requests object
+        """
+
+        uri = '/api/v1.0/companies/'      
+        url = self.server + uri
+        return self.get_pages(url,params,endpoint='companies_get_all',timeout=timeout,stream=stream)
 
-    def companies_get_specific(self,company_id,params={}):
+    def companies_get_specific(self,company_id,params={},timeout=None):
         """Get list of Companies from the client's build
             
             Arguments:
                 company_id {int} -- ID of the company
                 params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
             Returns:
                 requests object
         """
         uri = '/api/v1.0/companies/{0}'.format(company_id)         
         url = self.server + uri
-        results = requests.get(
+        results = self.request(
+            'GET',
             url,
-            timeout=5,
+            endpoint='companies_get_specific',
+            timeout=timeout,
             params=params
             )
         if results.ok:
@@ -69,7 +586,7 @@ class Sessions(object):
         else:
             SimproErrorHandler(results)
 
-    def plants_and_equipment_get_all(self,company_id,plant_type_id,params={}):
+    def plants_and_equipment_get_all(self,company_id,plant_type_id,params={},timeout=None,stream=False):
         """Get all plant and equipment
 
             Notes:
@@ -79,42 +596,56 @@ class Sessions(object):
                 company_id {integer} -- ID of the company
                 plant_type_id {integer} -- ID of the plant type
                 params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
+                stream {bool} -- Leave the body unread so its items can be parsed while it downloads, see iter_items
             Yields:
                 requests object
         """
-        current_page=1
-        last_page=1
         uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/'.format(company_id,plant_type_id)
         url = self.server + uri
-        params['page']=current_page
-        while(current_page <= last_page):
-            page=self.session.get(
-                url,
-                params=params,
-                timeout=5
-                )
-            if page.headers.get('Result-Pages'):
-                last_page=int(page.headers.get('Result-Pages'))
-            current_page += 1
-            params['page']=current_page
-            yield page
+        return self.get_pages(url,params,endpoint='plants_and_equipment_get_all',timeout=timeout,stream=stream)
+
+    def plants_and_equipment_get_page(self,company_id,plant_type_id,page_number,params={},timeout=None,stream=False):
+        """Get a single page of plant and equipment
+
+            Notes:
+                The Result-Pages header of the response gives the number of pages.
 
-    def plants_and_equipment_get_specific(self,company_id,plant_type_id,plant_id,params={}):
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                page_number {integer} -- Page to get, starting at 1
+                params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
+                stream {bool} -- Leave the body unread so its items can be parsed while it downloads, see iter_items
+            Returns:
+                requests object
+        """
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/'.format(company_id,plant_type_id)
+        url = self.server + uri
+        params=dict(params)
+        params.setdefault('pageSize',self.page_size)
+        return self.get_page(url,params,page_number,endpoint='plants_and_equipment_get_all',timeout=timeout,stream=stream)
+
+    def plants_and_equipment_get_specific(self,company_id,plant_type_id,plant_id,params={},timeout=None):
             """Get details from a specific plant and equipment
                 
                 Arguments:
                     company_id {integer} -- ID of the company
                     plant_type_id {integer} -- ID of the plant type
                 params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
                 Returns:
                     requests object
             """
 
             uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}'.format(company_id,plant_type_id,plant_id)
             url = self.server + uri
-            results = self.session.get(
+            results = self.request(
+                'GET',
                 url,
-                timeout=5,
+                endpoint='plants_and_equipment_get_specific',
+                timeout=timeout,
                 params=params
                 )
             if results.ok:
@@ -122,7 +653,7 @@ class Sessions(object):
             else:
                 SimproErrorHandler(results)       
 
-    def plants_and_equipment_custom_fields_get_all(self,company_id,plant_type_id,plant_id,params={}):
+    def plants_and_equipment_custom_fields_get_all(self,company_id,plant_type_id,plant_id,params={},timeout=None,stream=False):
         """Get all plant and equipment Custom Fields
         
             Arguments:
@@ -130,22 +661,48 @@ class Sessions(object):
                 plant_type_id {integer} -- ID of the plant type
                 plant_id {interger} -- ID of the plant            
                 params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
+                stream {bool} -- Leave the body unread so its items can be parsed while it downloads, see iter_items
             Returns:
                 requests object
         """
 
         uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/'.format(company_id,plant_type_id,plant_id)     
         url = self.server + uri
-        results = self.session.get(
+        results = self.request(
+            'GET',
             url,
-            timeout=5,
-            params=params)
+            endpoint='plants_and_equipment_custom_fields_get_all',
+            timeout=timeout,
+            params=params,
+            stream=stream)
         if results.ok:
             return results
         else:
             SimproErrorHandler(results)
 
-    def plants_and_equipment_custom_fields_get_specific(self,company_id,plant_type_id,plant_id,custom_field_id,params={}):
+    def plants_and_equipment_custom_fields_get_pages(self,company_id,plant_type_id,plant_id,params={},timeout=None,stream=False):
+        """Get all plant and equipment Custom Fields, following pagination
+
+            Notes:
+                Same as plants_and_equipment_custom_fields_get_all, which only returns the first page
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant_id {interger} -- ID of the plant
+                params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
+                stream {bool} -- Leave the body unread so its items can be parsed while it downloads, see iter_items
+            Yields:
+                requests object
+        """
+
+        uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/'.format(company_id,plant_type_id,plant_id)
+        url = self.server + uri
+        return self.get_pages(url,params,endpoint='plants_and_equipment_custom_fields_get_all',timeout=timeout,stream=stream)
+
+    def plants_and_equipment_custom_fields_get_specific(self,company_id,plant_type_id,plant_id,custom_field_id,params={},timeout=None):
         """Get details from a specific plant and equipment Custom Field
             
             Arguments:
@@ -156,22 +713,25 @@ class Sessions(object):
                 plant_id {interger} -- ID of the plant
                 custom_field_id {interger} -- ID of the Custom Field
                 params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
             Returns:
                 requests object
         """
 
         uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/{3}'.format(company_id,plant_type_id,plant_id,custom_field_id)
         url = self.server + uri
-        results = self.session.get(
+        results = self.request(
+            'GET',
             url,
-            timeout=5,
+            endpoint='plants_and_equipment_custom_fields_get_specific',
+            timeout=timeout,
             params=params)
         if results.ok:
             return results
         else:
             SimproErrorHandler(results)
 
-    def plants_and_equipment_custom_fields_patch_specific(self,company_id,plant_type_id,plant_id,custom_field_id,data):
+    def plants_and_equipment_custom_fields_patch_specific(self,company_id,plant_type_id,plant_id,custom_field_id,data=None,json=None,timeout=None):
         """Patch details to a specific plant and equipment Custom Field
         
             Arguments:
@@ -179,69 +739,70 @@ class Sessions(object):
                 plant_type_id {integer} -- ID of the plant type
                 plant_id {interger} -- ID of the plant
                 custom_field_id {interger} -- ID of the Custom Field
-                params {dict} -- Params/query options to pass to the request
+                data -- Body of the patch request
+                json {dict} -- Body of the patch request sent as json E.G. {'Value':'ABC123'}
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
             Returns:
                 requests object
         """
 
         uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/{2}/customFields/{3}'.format(company_id,plant_type_id,plant_id,custom_field_id)
         url = self.server + uri
-        results = self.session.patch(
+        results = self.request(
+            'PATCH',
             url,
+            endpoint='plants_and_equipment_custom_fields_patch_specific',
             data=data,
-            timeout=5
+            json=json,
+            timeout=timeout
             )
         if results.ok:
             return results
         else:
             SimproErrorHandler(results)
 
-    def plant_type_get_all(self,company_id,params={}):
+    def plant_type_get_all(self,company_id,params={},timeout=None,stream=False):
         """Get all Plant Types from a company
-            
+
+            Notes:
+                Can Handle Pagination
+                Since 0.2.0 this yields a response per page instead of returning one response
+
             Arguments:
                 company_id {integer} -- ID of the company
                 params {dict} -- Params/query options to pass to the request
-            Returns:
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
+                stream {bool} -- Leave the body unread so its items can be parsed while it downloads, see iter_items
+            Yields:
                 requests object
         """
 
         uri = "/api/v1.0/companies/{0}/plantTypes/".format(company_id)      
         url = self.server + uri
-        results = self.session.get(
-            url,
-            params=params,
-            timeout=5
-            )
-        if results.ok:
-            return results
-        else:
-            SimproErrorHandler(results)
+        return self.get_pages(url,params,endpoint='plant_type_get_all',timeout=timeout,stream=stream)
 
-    def plant_type_custom_fields_get_all(self,company_id,plant_type_id,params={}):
+    def plant_type_custom_fields_get_all(self,company_id,plant_type_id,params={},timeout=None,stream=False):
         """Get all plant and equipment Custom Fields
-            
+
+            Notes:
+                Can Handle Pagination
+                Since 0.2.0 this yields a response per page instead of returning one response
+
             Arguments:
                 company_id {integer} -- ID of the company
                 plant_type_id {integer} -- ID of the plant type
-                plant_id {interger} -- ID of the plant            
                 params {dict} -- Params/query options to pass to the request
-            Returns:
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
+                stream {bool} -- Leave the body unread so its items can be parsed while it downloads, see iter_items
+            Yields:
                 requests object
         """
 
         uri = '/api/v1.0/companies/{0}/plantTypes/{1}/customFields/'.format(company_id,plant_type_id) 
         url = self.server + uri
-        results = self.session.get(
-            url,
-            params=params,
-            timeout=1)
-        if results.ok:
-            return results
-        else:
-            SimproErrorHandler(results)
+        return self.get_pages(url,params,endpoint='plant_type_custom_fields_get_all',timeout=timeout,stream=stream)
 
-    def plant_type_custom_fields_get_specific(self,company_id,plant_type_id,plant_id,plant_type_custom_field_id,params={}):
+    def plant_type_custom_fields_get_specific(self,company_id,plant_type_id,plant_id,plant_type_custom_field_id,params={},timeout=None):
         """Get details from a specific plant and equipment Custom Field
             
             Arguments:
@@ -249,16 +810,19 @@ class Sessions(object):
                 plant_type_id {integer} -- ID of the plant type            
                 plant_type_custom_field_id {interger} -- ID of the Custom Field
                 params {dict} -- Params/query options to pass to the request
+                timeout {float|tuple} -- Overrides the timeout_policy for this call, seconds or (connect, read)
             Returns:
                 requests object
         """
 
         uri = '/api/v1.0/companies/{0}/plantTypes/{1}/plants/customFields/{3}'.format(company_id,plant_type_id,plant_id,plant_type_custom_field_id)
         url = self.server + uri
-        results = self.session.get(
+        results = self.request(
+            'GET',
             url,            
+            endpoint='plant_type_custom_fields_get_specific',
             params=params,
-            timeout=5
+            timeout=timeout
             )            
         if results.ok:
             return results
@@ -0,0 +1,81 @@
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class SingleFlight(object):
+    """Coalesces identical in-flight GET requests of Sessions
+
+        Notes:
+            While a request is in flight, callers asking for the same url and params wait for it
+            and receive the same response instead of sending their own. Nothing is kept once the
+            request completes, so unlike ResponseCache there is no staleness.
+            Keys include who the request is authorized as, so Sessions with different credentials
+            can share one instance to coalesce across them. Sessions.json decodes a separate copy
+            of a shared response for each caller.
+    """
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.calls={}
+        self.counters={'requests':0,'coalesced':0}
+
+    @staticmethod
+    def key(url,params=None,auth=None):
+        """Key of a request, params are order independent
+
+            Arguments:
+                url {string} -- Full url of the request
+                params {dict} -- Params/query options of the request
+                auth -- Who the request is authorized as, see Sessions.auth_identity
+        """
+        return (url,tuple(sorted((str(key),str(value)) for key,value in (params or {}).items())),auth)
+
+    def do(self,key,function,*args,**kwargs):
+        """Calls function unless a call with the same key is in flight, then waits for its result
+
+            Arguments:
+                key {tuple} -- Key of the request, see key
+                function {callable} -- Sends the request
+                args,kwargs -- Passed through to function
+            Returns:
+                The result of the call, waiting callers receive the same object.
+                An exception raised by the call is raised to every caller.
+        """
+        with self.lock:
+            call=self.calls.get(key)
+            if call is None:
+                call=self.calls[key]={'event':threading.Event(),'waiters':0,'result':None,'error':None}
+                self.counters['requests'] += 1
+                leader=True
+            else:
+                call['waiters'] += 1
+                self.counters['coalesced'] += 1
+                leader=False
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        try:
+            call['result']=function(*args,**kwargs)
+        except BaseException as e:
+            call['error']=e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                shared=call['waiters'] > 0
+            if shared:
+                logger.debug('Coalesced '+str(call['waiters'])+' requests of: '+str(key[0]))
+            call['event'].set()
+        return call['result']
+
+    def stats(self):
+        """Number of requests sent and of requests coalesced into one in flight
+
+            Returns:
+                {dict} -- {requests:, coalesced:}
+        """
+        with self.lock:
+            return dict(self.counters)
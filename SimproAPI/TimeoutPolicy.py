@@ -0,0 +1,60 @@
+import logging
+from .LatencyTracker import LatencyTracker
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class TimeoutPolicy(object):
+    """Connect and read timeouts of each endpoint, learnt from its recent latencies
+
+        Notes:
+            The read timeout of an endpoint is its percentile latency times multiplier, kept between
+            min_read and max_read, so slow but healthy endpoints aren't cut off and retried while
+            dead connections are still abandoned quickly. default_read is used until the endpoint
+            has enough latencies. Passing read fixes the read timeout of every endpoint, and a
+            timeout passed to a Sessions method overrides the policy for that call.
+            The connect timeout isn't learnt. Connecting is the TCP and TLS handshake with the
+            server, it takes the same time whichever endpoint is called, and the latencies
+            recorded span connect and read so they say nothing about it on their own. 3.05 is
+            just over the 3 second TCP retransmission window, so one lost SYN is retried before
+            giving up.
+    """
+    def __init__(self,connect=3.05,read=None,default_read=5,percentile=99,multiplier=3,min_read=1,max_read=60,latency_tracker=None):
+        """
+            Arguments:
+                connect {float} -- Connect timeout in seconds
+                read {float} -- Fixed read timeout of every endpoint, None to learn it
+                default_read {float} -- Read timeout of an endpoint without enough latencies
+                percentile {float} -- Latency percentile the read timeout is based on
+                multiplier {float} -- Multiple of the percentile latency allowed
+                min_read {float} -- Shortest learnt read timeout
+                max_read {float} -- Longest learnt read timeout
+                latency_tracker {LatencyTracker} -- Tracker of endpoint latencies, defaults to a new one.
+                    Share it with a HedgePolicy so both learn from the same latencies.
+        """
+        self.connect=connect
+        self.read=read
+        self.default_read=default_read
+        self.percentile=percentile
+        self.multiplier=multiplier
+        self.min_read=min_read
+        self.max_read=max_read
+        self.latency_tracker=LatencyTracker() if latency_tracker is None else latency_tracker
+
+    def timeout(self,endpoint,override=None):
+        """Timeout of a request to an endpoint
+
+            Arguments:
+                endpoint {string} -- Name of the endpoint method
+                override {float|tuple} -- Timeout of this call, returned as is when given
+            Returns:
+                {tuple} -- (connect timeout, read timeout) in seconds, as accepted by requests
+        """
+        if override is not None:
+            return override
+        if self.read is not None:
+            return (self.connect,self.read)
+        latency=self.latency_tracker.percentile(endpoint,self.percentile)
+        if latency is None:
+            return (self.connect,self.default_read)
+        return (self.connect,min(max(latency*self.multiplier,self.min_read),self.max_read))
@@ -1,7 +1,9 @@
-import requests
+import os
 import json
+import tempfile
 from json import JSONEncoder
 from .OAuth2 import OAuth2
+from .FileLock import FileLock
 from .Exceptions import InvalidGrantRefreshTokenError
 import datetime
 import logging
@@ -19,8 +21,22 @@ class datetime_encoder(JSONEncoder):
 
 class TokenManager(object):
     """Class to Manage Simpro Auth Token's"""
-    def __init__(self,server,client_id,client_secret,username,password,save_location=None):
+    def __init__(self,server,client_id,client_secret,username,password,save_location=None,transport=None):
+        """
+            Arguments:
+                server {string} -- Server URI
+                client_id {string} -- OAuth2 client id
+                client_secret {string} -- OAuth2 client secret
+                username {string} -- Simpro username
+                password {string} -- Simpro password
+                save_location {string} -- Location of the token file, defaults to simpro_token.json
+                transport {Transport} -- Optional pooled transport shared with other classes, it is left open on close
+        """
+        #Reused for every refresh so the token endpoint connection is kept alive
+        self.oauth2=OAuth2(server,transport=transport)
         self.save_location='simpro_token.json' if not save_location else save_location
+        #Held while refreshing so only one process refreshes the shared token file
+        self.file_lock=FileLock(self.save_location+'.lock')
         self.access_token=''
         self.refresh_token=''
         self.refresh_token_expires=None
@@ -32,6 +48,16 @@ class TokenManager(object):
         self.password=password
         self.server=server
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exec_types,exec_val,exc_tb):
+        self.close()
+
+    def close(self):
+        """Closes the OAuth2 client, its transport is left open if it is shared"""
+        self.oauth2.close()
+
     def get_token(self):
         """Get an authorisation token for future requests.
             Sets the results to the class object
@@ -39,21 +65,19 @@ class TokenManager(object):
         logger.info("Token expired, initiating token renewal.")        
         #Use password grant type with username and password
         if not self.refresh_token:
-            with OAuth2(self.server) as oauth2:
-                token=oauth2.post(
-                    client_id=self.client_id,
-                    client_secret=self.client_secret,
-                    username=self.username,
-                    password=self.password
-                )
+            token=self.oauth2.post(
+                client_id=self.client_id,
+                client_secret=self.client_secret,
+                username=self.username,
+                password=self.password
+            )
         #Otherwise use the refresh_token.
         else:
-            with OAuth2(self.server) as oauth2:
-                token=oauth2.post(
+            token=self.oauth2.post(
                 client_id=self.client_id,
                 client_secret=self.client_secret,
                 refresh_token=self.refresh_token
-                )
+            )
         #Create and set the expires date time
         time_now = datetime.datetime.now().astimezone()
         self.expires = time_now + datetime.timedelta(seconds=int(token['expires_in']))
@@ -68,6 +92,10 @@ class TokenManager(object):
 
     def save_token(self):
         """writes the token information to a file for later use
+
+            Notes:
+                The file is written to a temporary file and then atomically replaced,
+                so other processes never read a partially written token.
         """
         auth={
             'access_token':self.access_token,
@@ -78,8 +106,21 @@ class TokenManager(object):
         }
         auth_json = json.dumps(auth,cls=datetime_encoder)        
         try:
-            with open(self.save_location,'w') as auth_file:
-                auth_file.write(auth_json)
+            auth_file=tempfile.NamedTemporaryFile(
+                'w',
+                dir=os.path.dirname(os.path.abspath(self.save_location)),
+                prefix=os.path.basename(self.save_location)+'.',
+                suffix='.tmp',
+                delete=False)
+            try:
+                with auth_file:
+                    auth_file.write(auth_json)
+                    auth_file.flush()
+                    os.fsync(auth_file.fileno())
+                os.replace(auth_file.name,self.save_location)
+            except BaseException:
+                os.remove(auth_file.name)
+                raise
             logger.info('Saved token to: '+ self.save_location)
         except PermissionError as e:
             logger.error(e)
@@ -106,15 +147,39 @@ class TokenManager(object):
                 self.refresh_token_expires=datetime.datetime.fromisoformat(auth_dict['refresh_token_expires'])
                 logger.info('Found '+self.save_location+' loading data')
 
-    def update_token(self):
-        """checks if the token is expired as requests another token if it is."""
+    def update_token(self,stale_token=None,refresh_margin=300):
+        """checks if the token is expired as requests another token if it is.
+
+            Notes:
+                Holds a file lock next to save_location and reloads the saved token first,
+                so when several processes share save_location only one of them refreshes
+                and the others pick up the new token.
+
+            Arguments:
+                stale_token {string} -- A token the server rejected, it is renewed unless
+                    the saved token has already been replaced
+                refresh_margin {int} -- Seconds before expiry the token is renewed, see check_token
+        """
+        with self.file_lock:
+            if os.path.exists(self.save_location):
+                self.load_token()
+            if stale_token is not None and self.access_token == stale_token:
+                self.expired=True
+            return self.check_token(refresh_margin)
+
+    def check_token(self,refresh_margin=300):
+        """checks if the token is expired as requests another token if it is, without reloading it.
+
+            Arguments:
+                refresh_margin {int} -- Seconds before expiry the token is treated as expired
+        """
 
         time_now = datetime.datetime.now().astimezone()
-        time_now_plus_5=time_now + datetime.timedelta(minutes=5)
+        time_now_plus_margin=time_now + datetime.timedelta(seconds=refresh_margin)
         result = False
         expires_valid = isinstance(self.expires,datetime.date)
         #If valid date and time_now is greater or equal than expired date
-        if expires_valid and time_now_plus_5 >= self.expires and not self.expired:
+        if expires_valid and time_now_plus_margin >= self.expires and not self.expired:
                 logger.debug('Auth token expires time >= time now')
                 #Set the token to expired
                 self.expired=True
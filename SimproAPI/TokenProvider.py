@@ -0,0 +1,97 @@
+import datetime
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class TokenProvider(object):
+    """Thread-safe source of the current access token of a TokenManager
+
+        Notes:
+            Pass it to Sessions or Trackables in place of a token string, every request then
+            reads the current token. Refreshes are single-flight: concurrent callers wait on
+            one refresh instead of each calling /oauth2/token. Across processes the
+            TokenManager file lock does the same.
+            start() runs a daemon thread that refreshes ahead of expiry.
+    """
+    def __init__(self,token_manager,refresh_margin=300,check_interval=30):
+        """
+            Arguments:
+                token_manager {TokenManager} -- Token manager used to refresh the token
+                refresh_margin {int} -- Seconds before expiry the token is refreshed
+                check_interval {int} -- Seconds between expiry checks of the background thread
+        """
+        self.token_manager=token_manager
+        self.refresh_margin=refresh_margin
+        self.check_interval=check_interval
+        self.lock=threading.Lock()
+        self.stop_event=threading.Event()
+        self.thread=None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self,exec_types,exec_val,exc_tb):
+        self.stop()
+
+    def expiring(self):
+        """Checks if the token is missing or expires within refresh_margin"""
+        expires=self.token_manager.expires
+        if not self.token_manager.access_token or not isinstance(expires,datetime.datetime):
+            return True
+        time_now=datetime.datetime.now().astimezone()
+        return time_now+datetime.timedelta(seconds=self.refresh_margin) >= expires
+
+    def get_token(self):
+        """Gets the current access token, refreshing it first when it is expiring
+
+            Returns:
+                {string} -- access token
+        """
+        token=self.token_manager.access_token
+        if self.expiring():
+            token=self.refresh(token)
+        return token
+
+    def refresh(self,stale_token=None):
+        """Refreshes the token unless another caller already replaced stale_token
+
+            Arguments:
+                stale_token {string} -- The token the caller found expired or rejected
+            Returns:
+                {string} -- access token
+        """
+        with self.lock:
+            if stale_token is not None and self.token_manager.access_token != stale_token and not self.expiring():
+                return self.token_manager.access_token
+            logger.info('Refreshing auth token')
+            self.token_manager.update_token(stale_token=stale_token,refresh_margin=self.refresh_margin)
+            return self.token_manager.access_token
+
+    def start(self):
+        """Starts refreshing the token ahead of expiry on a daemon thread"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread=threading.Thread(target=self.run,daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops the background refresh thread"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread=None
+
+    def run(self):
+        """Background refresh loop"""
+        while True:
+            try:
+                if self.expiring():
+                    self.refresh()
+            except Exception:
+                logger.exception('Background token refresh failed')
+            if self.stop_event.wait(self.check_interval):
+                return
@@ -1,8 +1,14 @@
 import logging
 from .Sessions import Sessions
-import json
+from .MatchIndex import MatchIndex
+from .Exceptions import Error
 import requests
 import itertools
+import collections
+import json
+import threading
+import time
+import datetime
 import concurrent.futures
 
 logger = logging.getLogger(__name__)
@@ -10,16 +16,63 @@ logger.debug('Importing Module : '+__name__)
 
 class Trackables(object):
     """Class containing methods to find Trackable Plants and Equipment"""
+    #Search filter sent as DateModified by incremental crawls
+    modified_since_filter='gt({0})'
+    #Seconds each incremental crawl overlaps the previous one
+    modified_since_overlap=300
+    #Sentinel for a custom field without a last known value
+    unknown_value=object()
 
-    def __init__(self,server,token):
-        self.simpro_session=Sessions(server,token)
+    def __init__(self,server,token,max_workers=8,rate_limiter=None,cache=None,metadata_store=None,metadata_max_age=86400,metadata_min_age=300,transport=None,metrics=None,json_decoder=None,single_flight=None,hedge_policy=None,timeout_policy=None):
+        """
+            Arguments:
+                server {string} -- Server URI
+                token {string|TokenProvider} -- Token value to be used for accessing the API, see Sessions
+                max_workers {int} -- Default number of worker threads used by the concurrent methods,
+                    the connection pool of the session is sized to match when no transport is given.
+                    Larger max_workers passed to a method are capped at the size of the connection pool.
+                rate_limiter {RateLimiter} -- Optional rate limiter shared with other Sessions
+                cache {ResponseCache} -- Optional cache of GET responses, E.G. plant types and their custom fields
+                metadata_store {MetadataStore} -- Optional persistent store of plant types used by get_plant_types
+                metadata_max_age {int} -- Seconds before stored plant types are refreshed in the background
+                metadata_min_age {int} -- Seconds before a custom field name missing from the store triggers a refresh
+                transport {Transport} -- Optional pooled transport shared with other classes, size its pool_maxsize to max_workers
+                metrics {Metrics} -- Optional per endpoint request metrics and hooks
+                json_decoder {JsonDecoder} -- Decoder of response bodies, defaults to the fastest backend installed
+                single_flight {SingleFlight} -- Optional coalescing of identical in-flight GET requests, see Sessions
+                hedge_policy {HedgePolicy} -- Optional hedging of slow GET requests with a duplicate request
+                timeout_policy {TimeoutPolicy} -- Timeouts of each endpoint, see Sessions
+        """
+        self.max_workers=max_workers
+        #Threads beyond the connection pool would open and discard extra connections
+        self.pool_maxsize=max_workers+4 if transport is None else transport.pool_maxsize
+        self.metadata_store=metadata_store
+        self.metadata_max_age=metadata_max_age
+        self.metadata_min_age=metadata_min_age
+        self.metadata_lock=threading.Lock()
+        self.metadata_refreshing=set()
+        self.simpro_session=Sessions(server,token,pool_maxsize=self.pool_maxsize,rate_limiter=rate_limiter,cache=cache,transport=transport,metrics=metrics,json_decoder=json_decoder,single_flight=single_flight,hedge_policy=hedge_policy,timeout_policy=timeout_policy)
     
     def __enter__(self):
         return self
     
     def __exit__(self,exec_types,exec_val,exc_tb):
-        self.simpro_session.session.close()
+        self.simpro_session.close()
+
 
+    def worker_count(self,max_workers=None):
+        """Number of worker threads for a call, capped at the size of the connection pool
+
+            Arguments:
+                max_workers {int} -- Requested number of worker threads, defaults to the max_workers of the class
+            Returns:
+                {int} -- Number of worker threads
+        """
+        max_workers=self.max_workers if not max_workers else max_workers
+        if max_workers > self.pool_maxsize:
+            logger.debug('Capping max_workers: '+str(max_workers)+' at the connection pool size: '+str(self.pool_maxsize))
+            return self.pool_maxsize
+        return max_workers
 
     def split_iterable(self,iterable, size):
         """Splits an iterable into specified sizes.
@@ -40,12 +93,27 @@ class Trackables(object):
                 break
             yield chunk
 
-    def get_companies(self,company_id,custom_field_names,concurrently=False):
+    def get_companies(self,company_id,custom_field_names,concurrently=False,fetch_mode='specific',incremental=False,checkpoint=None):
         """Finds all trackable equipment in a simpro company or companies
-        
+
+            Notes:
+                Results are only yielded once a whole company is done, use get_companies_stream
+                to receive each plant as soon as it arrives.
+
             Arguments:           
                 company_id {list} -- ID's of the companies to search             
                 custom_field_names {list} -- list of custom field names to match against
+                concurrently {bool} -- Crawl every company, plant type and plant on one shared thread pool, see fan_out.
+                    Companies are still yielded in the order given.
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
+                incremental {bool} -- Only return plants modified since the last incremental crawl of their plant type.
+                    Requires a metadata_store, which keeps a high-water mark per company and plant type.
+                    The marks of a company are saved once its result has been consumed.
+                checkpoint {CrawlCheckpoint} -- Record finished companies, plant types and plant pages with their results,
+                    so a crawl that was interrupted resumes where it stopped instead of starting over.
+                    A company is recorded as delivered once yielded, also when the generator is closed or fails at it,
+                    so a resumed crawl doesn't yield it again. Only the pages in flight are requested again.
+                    Without concurrently the crawl runs on a single worker thread. The checkpoint is cleared once the crawl completes.
 
             Yields:
                 {dictionary} -- {
@@ -72,6 +140,9 @@ class Trackables(object):
                         }]
                 }
         """
+        if concurrently or checkpoint is not None:
+            yield from self.get_companies_fan_out(company_id,custom_field_names,fetch_mode,incremental,None if concurrently else 1,checkpoint)
+            return
         #Iterate over the provided company ID's
         for company in company_id:
             #Start of the results table
@@ -79,6 +150,8 @@ class Trackables(object):
                 'id':company,
                 'trackable_plants':[]
             }
+            #High-water marks to save once the company has been consumed
+            high_water_marks={}
             #reference to use below
             logger.debug('Getting trackable equipment for company: '+str(company))
             trackable_plant_types=self.get_plant_types(
@@ -88,22 +161,15 @@ class Trackables(object):
             #Iterate over the trackable plant types
             for trackable_plant_type in trackable_plant_types:
                 logger.debug('Getting trackable equipment for plant: '+str(trackable_plant_type['id']))
-                #reference to use below
-                if concurrently:
-                    #This method uses multiprocessing
-                    trackable_plants=self.get_equipment_concurrent(
-                        company,
-                        trackable_plant_type['id'],
-                        #Iterate over the cutsom fields in the trackable plant that we want to retreive
-                        [custom_fields['id'] for custom_fields in trackable_plant_type['custom_fields']]
-                    )                    
-                else:
-                    trackable_plants=self.get_equipment(
-                        company,
-                        trackable_plant_type['id'],
-                        #Iterate over the cutsom fields in the trackable plant that we want to retreive
-                        [custom_fields['id'] for custom_fields in trackable_plant_type['custom_fields']]
-                    )
+                params=None
+                if incremental:
+                    params,high_water_marks[trackable_plant_type['id']]=self.modified_since_params(company,trackable_plant_type['id'])
+                trackable_plants=self.get_trackable_equipment(
+                    company,
+                    trackable_plant_type,
+                    fetch_mode,
+                    params
+                )
                 #Iterate over the trackable equipment
                 trackable_plant_results=[]
                 for trackable_plant in trackable_plants:
@@ -116,12 +182,407 @@ class Trackables(object):
             if result['trackable_plants']:
                 logger.debug('Successfully found specified custom_field_names: {company_id: '+str(company)+' plant_type_id: '+str(trackable_plant_type['id'])+'}')
                 yield result
+                if high_water_marks:
+                    self.metadata_store.set_high_water_marks(company,high_water_marks)
             else:
                 logger.debug('Failed to find specified custom_field_names: {company_id: '+str(company))
 
+    def get_companies_stream(self,company_id,custom_field_names,concurrently=False,fetch_mode='specific',incremental=False,checkpoint=None):
+        """Streams trackable equipment as flat records as soon as each plant's custom fields arrive
+
+            Notes:
+                Unlike get_companies nothing is collected per company, so memory stays flat
+                regardless of the number of plants. With incremental the high-water mark of a
+                plant type is saved once all of its records have been consumed.
+
+            Arguments:
+                company_id {list} -- ID's of the companies to search
+                custom_field_names {list} -- list of custom field names to match against
+                concurrently {bool} -- Crawl every company, plant type and plant on one shared thread pool, see fan_out.
+                    Records of different plant types and companies are then interleaved.
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
+                incremental {bool} -- Only return plants modified since the last incremental crawl, see get_companies
+                checkpoint {CrawlCheckpoint} -- Record finished plant pages so an interrupted crawl resumes where it stopped,
+                    see get_companies. The plants yielded are recorded, including those of pages in flight when the
+                    generator is closed or fails, so a resumed crawl doesn't yield them again. If the process is killed
+                    outright only finished pages are recorded, and the plants yielded from pages in flight are yielded again.
+
+            Yields:
+                {dictionary} -- {
+                    company_id:'',#ID of the company
+                    plant_type_id:'',#ID of the plant type
+                    plant_id:'',#ID of the plant
+                    custom_fields:[{
+                        id:'', #ID of the custom field
+                        name:'',Name of the custom field
+                        value:'',Value of the custom field
+                    }]
+                }
+        """
+        if concurrently or checkpoint is not None:
+            yield from self.get_companies_stream_fan_out(company_id,custom_field_names,fetch_mode,incremental,None if concurrently else 1,checkpoint)
+            return
+        for company in company_id:
+            logger.debug('Streaming trackable equipment for company: '+str(company))
+            for trackable_plant_type in self.get_plant_types(company,custom_field_names):
+                params=None
+                if incremental:
+                    params,high_water_mark=self.modified_since_params(company,trackable_plant_type['id'])
+                trackable_plants=self.get_trackable_equipment(
+                    company,
+                    trackable_plant_type,
+                    fetch_mode,
+                    params
+                )
+                for trackable_plant in trackable_plants:
+                    yield {
+                        'company_id':company,
+                        'plant_type_id':trackable_plant_type['id'],
+                        'plant_id':trackable_plant['id'],
+                        'custom_fields':trackable_plant['custom_fields']
+                    }
+                if incremental:
+                    self.metadata_store.set_high_water_marks(company,{trackable_plant_type['id']:high_water_mark})
+
+    def get_companies_fan_out(self,company_id,custom_field_names,fetch_mode='specific',incremental=False,max_workers=None,checkpoint=None):
+        """get_companies on one shared thread pool, companies are reassembled and yielded in the order given
+
+            Arguments:
+                see get_companies
+                max_workers {int} -- Number of worker threads, defaults to the max_workers of the class
+            Yields:
+                {dictionary} -- Same structure as get_companies
+        """
+        company_id=list(company_id)
+        if checkpoint is not None:
+            checkpoint.start(self.checkpoint_key('get_companies',company_id,custom_field_names,fetch_mode,incremental))
+            done_companies=checkpoint.done_companies()
+            company_id=[company for company in company_id if company not in done_companies]
+        results={}
+        plant_types_by_id={}
+        high_water_marks={}
+        finished=set()
+        next_company=0
+        #A company that has been yielded, it is recorded as delivered even if the generator is closed at the yield
+        yielded=None
+        events=self.fan_out(company_id,custom_field_names,fetch_mode,incremental,max_workers,checkpoint=checkpoint,replay=True)
+        try:
+            for event in events:
+                if event[0] == 'plant_types':
+                    company,plant_types,high_water_marks[company]=event[1:]
+                    for trackable_plant_type in plant_types:
+                        trackable_plant_type['trackable_plant']=[]
+                    results[company]={'id':company,'trackable_plants':plant_types}
+                    plant_types_by_id[company]={trackable_plant_type['id']:trackable_plant_type for trackable_plant_type in plant_types}
+                elif event[0] == 'plant':
+                    plant_types_by_id[event[1]][event[2]]['trackable_plant'].append(event[3])
+                elif event[0] == 'company_done':
+                    finished.add(event[1])
+                    #Hold finished companies until every company before them has been yielded
+                    while next_company < len(company_id) and company_id[next_company] in finished:
+                        company=company_id[next_company]
+                        next_company += 1
+                        result=results.pop(company)
+                        plant_types_by_id.pop(company)
+                        if result['trackable_plants']:
+                            logger.debug('Successfully found specified custom_field_names: {company_id: '+str(company)+'}')
+                            yielded=company
+                            yield result
+                        else:
+                            logger.debug('Failed to find specified custom_field_names: {company_id: '+str(company))
+                        yielded=None
+                        self.company_delivered(company,high_water_marks.pop(company,None),checkpoint)
+        finally:
+            events.close()
+            if yielded is not None:
+                self.company_delivered(yielded,high_water_marks.pop(yielded,None),checkpoint)
+        if checkpoint is not None:
+            checkpoint.clear()
+
+    def company_delivered(self,company_id,high_water_marks,checkpoint=None):
+        """Saves the high-water marks of a company that has been yielded and records it done in the checkpoint"""
+        if high_water_marks:
+            self.metadata_store.set_high_water_marks(company_id,high_water_marks)
+        if checkpoint is not None:
+            checkpoint.company_done(company_id)
+
+    def get_companies_stream_fan_out(self,company_id,custom_field_names,fetch_mode='specific',incremental=False,max_workers=None,checkpoint=None):
+        """get_companies_stream on one shared thread pool
+
+            Arguments:
+                see get_companies_stream
+                max_workers {int} -- Number of worker threads, defaults to the max_workers of the class
+            Yields:
+                {dictionary} -- Same structure as get_companies_stream
+        """
+        company_id=list(company_id)
+        if checkpoint is not None:
+            checkpoint.start(self.checkpoint_key('get_companies_stream',company_id,custom_field_names,fetch_mode,incremental))
+            done_companies=checkpoint.done_companies()
+            company_id=[company for company in company_id if company not in done_companies]
+        events=self.fan_out(company_id,custom_field_names,fetch_mode,incremental,max_workers,checkpoint=checkpoint)
+        try:
+            for event in events:
+                if event[0] == 'plant':
+                    yield {
+                        'company_id':event[1],
+                        'plant_type_id':event[2],
+                        'plant_id':event[3]['id'],
+                        'custom_fields':event[3]['custom_fields']
+                    }
+                elif event[0] == 'plant_type_done' and incremental and event[3] is not None:
+                    self.metadata_store.set_high_water_marks(event[1],{event[2]:event[3]})
+                elif event[0] == 'company_done' and checkpoint is not None:
+                    checkpoint.company_done(event[1])
+        finally:
+            #Records the plants yielded from unfinished pages
+            events.close()
+        if checkpoint is not None:
+            checkpoint.clear()
+
+    def checkpoint_key(self,method,company_id,custom_field_names,fetch_mode,incremental):
+        """Identifies a crawl in a CrawlCheckpoint by its arguments"""
+        return json.dumps([self.simpro_session.server,method,list(company_id),list(custom_field_names),fetch_mode,incremental],default=str)
+
+    def fan_out(self,company_id,custom_field_names,fetch_mode='specific',incremental=False,max_workers=None,chunk_size=None,checkpoint=None,replay=False):
+        """Crawls companies, plant types and plants on one shared thread pool
+
+            Notes:
+                Finding a company's plant types, listing a page of plants and getting the custom fields
+                of a chunk of plants are each a task on the same pool of max_workers threads, so
+                small plant types and separate companies overlap instead of running one after another.
+                Tasks never wait on other tasks, they return their child tasks to this coordinator.
+                Pending tasks run last in first out so a company is finished before the next is started,
+                which keeps the number of listed but unfinished plants bounded.
+                With a checkpoint the plant types of each company, the page count of each plant type and
+                every finished page are recorded, and are skipped when the crawl is resumed.
+                A page is recorded once its plants have been yielded. Without replay the plants yielded
+                from unfinished pages are recorded when the generator is closed or fails, and skipped on resume.
+
+            Arguments:
+                company_id {list} -- ID's of the companies to search
+                custom_field_names {list} -- list of custom field names to match against
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
+                incremental {bool} -- Only list plants modified since the last incremental crawl, see get_companies.
+                    High-water marks are yielded, not saved.
+                max_workers {int} -- Number of worker threads, defaults to the max_workers of the class
+                chunk_size {int} -- Number of plants in each unit of work, defaults to 1
+                checkpoint {CrawlCheckpoint} -- Optional record of finished units to resume from
+                replay {bool} -- Keep the plants of finished pages in the checkpoint and yield them again on resume
+            Yields:
+                {tuple} -- Events in the order they happen:
+                    ('plant_types',company_id,[trackable plant types as yielded by get_plant_types],{plant_type_id:high-water mark})
+                    ('plant',company_id,plant_type_id,{id:,custom_fields:[]})
+                    ('plant_type_done',company_id,plant_type_id,high-water mark or None)
+                    ('company_done',company_id)
+        """
+        max_workers=self.worker_count(max_workers)
+        chunk_size=1 if not chunk_size else chunk_size
+        #Tasks waiting for a worker (company_id,plant_type_id,page_number,function,args), the last is submitted first
+        pending=[(company,None,None,self.fan_out_company,(company,custom_field_names,fetch_mode,incremental,chunk_size,checkpoint,replay))
+            for company in reversed(list(company_id))]
+        #Unfinished tasks of each company, (company,plant_type_id) and (company,plant_type_id,page_number)
+        company_tasks=collections.Counter(task[0] for task in pending)
+        plant_type_tasks=collections.Counter()
+        page_tasks=collections.Counter()
+        page_records={}
+        #Plants yielded from unfinished pages {(company,plant_type_id,page_number):[plant_id]}
+        delivered={}
+        track_delivered=checkpoint is not None and not replay
+        high_water_marks={}
+        futures={}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            logger.debug('Starting fan out of '+str(len(pending))+' companies max_workers:'+str(max_workers))
+            try:
+                while pending or futures:
+                    #Keep the queue short so results flow while work is still being found
+                    while pending and len(futures) < max_workers*2:
+                        company,plant_type_id,page_number,function,args=pending.pop()
+                        futures[executor.submit(function,*args)]=(company,plant_type_id,page_number)
+                    done,_=concurrent.futures.wait(futures,return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        company,plant_type_id,page_number=futures.pop(future)
+                        events,children=future.result()
+                        for child in children:
+                            company_tasks[child[0]] += 1
+                            plant_type_tasks[child[0],child[1]] += 1
+                            page_tasks[child[0],child[1],child[2]] += 1
+                            pending.append(child)
+                        plant_types=[]
+                        for event in events:
+                            if event[0] == 'plant_types':
+                                high_water_marks.update(((company,key),value) for key,value in event[3].items())
+                                plant_types=event[2]
+                            elif event[0] == 'plant' and track_delivered and page_number is not None:
+                                delivered.setdefault((company,plant_type_id,page_number),[]).append(event[3]['id'])
+                            yield event
+                        if page_number is not None:
+                            if checkpoint is not None and replay:
+                                page_records.setdefault((company,plant_type_id,page_number),[]).extend(event[3] for event in events if event[0] == 'plant')
+                            page_tasks[company,plant_type_id,page_number] -= 1
+                            if not page_tasks[company,plant_type_id,page_number]:
+                                del page_tasks[company,plant_type_id,page_number]
+                                delivered.pop((company,plant_type_id,page_number),None)
+                                if checkpoint is not None:
+                                    checkpoint.save_page(company,plant_type_id,page_number,page_records.pop((company,plant_type_id,page_number),None))
+                        if plant_type_id is not None:
+                            plant_type_tasks[company,plant_type_id] -= 1
+                            if not plant_type_tasks[company,plant_type_id]:
+                                del plant_type_tasks[company,plant_type_id]
+                                yield ('plant_type_done',company,plant_type_id,high_water_marks.pop((company,plant_type_id),None))
+                        #Plant types whose pages were all finished before a resume have no tasks
+                        for trackable_plant_type in plant_types:
+                            if not plant_type_tasks[company,trackable_plant_type['id']]:
+                                del plant_type_tasks[company,trackable_plant_type['id']]
+                                yield ('plant_type_done',company,trackable_plant_type['id'],high_water_marks.pop((company,trackable_plant_type['id']),None))
+                        company_tasks[company] -= 1
+                        if not company_tasks[company]:
+                            del company_tasks[company]
+                            yield ('company_done',company)
+            finally:
+                for future in futures:
+                    future.cancel()
+                for (company,plant_type_id,page_number),plant_ids in delivered.items():
+                    checkpoint.save_delivered(company,plant_type_id,page_number,plant_ids)
+        logger.debug('Finished fan out')
+
+    def fan_out_company(self,company_id,custom_field_names,fetch_mode,incremental,chunk_size,checkpoint=None,replay=False):
+        """fan_out task finding the trackable plant types of a company
+
+            Notes:
+                When resuming from a checkpoint only the unfinished pages become tasks.
+
+            Returns:
+                {tuple} -- (events,child tasks listing the pages of each plant type)
+        """
+        stored=checkpoint.get_plant_types(company_id) if checkpoint is not None else None
+        if stored is not None:
+            plant_types,high_water_marks=stored
+        else:
+            plant_types=list(self.get_plant_types(company_id,custom_field_names))
+            high_water_marks={}
+        events=[('plant_types',company_id,plant_types,high_water_marks)]
+        children=[]
+        for trackable_plant_type in reversed(plant_types):
+            plant_type_id=trackable_plant_type['id']
+            params=None
+            if incremental:
+                params,high_water_mark=self.modified_since_params(company_id,plant_type_id)
+                high_water_marks.setdefault(plant_type_id,high_water_mark)
+            page_count=checkpoint.get_page_count(company_id,plant_type_id) if stored is not None else None
+            if page_count is None:
+                children.append((company_id,plant_type_id,1,self.fan_out_page,
+                    (company_id,trackable_plant_type,params,1,fetch_mode,chunk_size,True,checkpoint)))
+                continue
+            finished_pages=checkpoint.get_pages(company_id,plant_type_id)
+            for page_number in range(page_count,0,-1):
+                if page_number not in finished_pages:
+                    skip_plants=None if replay else checkpoint.get_delivered(company_id,plant_type_id,page_number)
+                    children.append((company_id,plant_type_id,page_number,self.fan_out_page,
+                        (company_id,trackable_plant_type,params,page_number,fetch_mode,chunk_size,False,checkpoint,skip_plants)))
+                elif replay:
+                    events+=[('plant',company_id,plant_type_id,plant) for plant in finished_pages[page_number] or []]
+        if checkpoint is not None and stored is None:
+            checkpoint.save_plant_types(company_id,plant_types,high_water_marks)
+        return events,children
+
+    def fan_out_page(self,company_id,trackable_plant_type,params,page_number,fetch_mode,chunk_size,list_pages=None,checkpoint=None,skip_plants=None):
+        """fan_out task listing a page of plants
+
+            Notes:
+                With list_pages, the default for the first page, a task is added for every other page.
+                In columns mode the custom fields are already in the listing so the plants are returned
+                straight away, otherwise each chunk of plants becomes a task.
+                Plants in skip_plants were yielded before a resume and are left out.
+
+            Returns:
+                {tuple} -- (events,child tasks)
+        """
+        plant_type_id=trackable_plant_type['id']
+        custom_field_ids=[custom_fields['id'] for custom_fields in trackable_plant_type['custom_fields']]
+        page=self.simpro_session.plants_and_equipment_get_page(
+            company_id,
+            plant_type_id,
+            page_number,
+            dict(self.plant_columns(fetch_mode),**(params or {}))
+        )
+        plants=self.simpro_session.json(page)
+        if skip_plants:
+            plants=[plant for plant in plants if plant['ID'] not in skip_plants]
+        if fetch_mode == 'columns':
+            events=[('plant',company_id,plant_type_id,plant) for plant in self.get_equipment_chunks(plants,company_id,plant_type_id,custom_field_ids,fetch_mode) or []]
+            children=[]
+        else:
+            events=[]
+            children=[(company_id,plant_type_id,page_number,self.fan_out_chunk,(company_id,plant_type_id,chunk,custom_field_ids,fetch_mode))
+                for chunk in reversed(list(self.split_iterable(plants,chunk_size)))]
+        if list_pages is None:
+            list_pages=page_number == 1
+        if list_pages:
+            last_page=int(page.headers.get('Result-Pages') or 1)
+            if checkpoint is not None:
+                checkpoint.save_page_count(company_id,plant_type_id,last_page)
+            #Pushed last so the remaining pages are listed before the chunks are worked through
+            children+=[(company_id,plant_type_id,next_page,self.fan_out_page,(company_id,trackable_plant_type,params,next_page,fetch_mode,chunk_size,False,checkpoint))
+                for next_page in range(last_page,1,-1)]
+        return events,children
+
+    def fan_out_chunk(self,company_id,plant_type_id,plant_ids,custom_field_ids,fetch_mode):
+        """fan_out task getting the custom fields of a chunk of plants
+
+            Returns:
+                {tuple} -- (events,no child tasks)
+        """
+        results=self.get_equipment_chunks(plant_ids,company_id,plant_type_id,custom_field_ids,fetch_mode) or []
+        return [('plant',company_id,plant_type_id,plant) for plant in results],[]
+
+    def get_trackable_equipment(self,company_id,trackable_plant_type,fetch_mode='specific',params=None):
+        """Gets the equipment of a trackable plant type
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                trackable_plant_type {dict} -- plant type as yielded by get_plant_types
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
+                params {dict} -- Extra params/query options used to filter the plant listing
+            Returns:
+                {generator} -- Same structure as yielded by get_equipment
+        """
+        #Iterate over the cutsom fields in the trackable plant that we want to retreive
+        custom_field_ids=[custom_fields['id'] for custom_fields in trackable_plant_type['custom_fields']]
+        return self.get_equipment(
+            company_id,
+            trackable_plant_type['id'],
+            custom_field_ids,
+            fetch_mode=fetch_mode,
+            params=params
+        )
+
+    def modified_since_params(self,company_id,plant_type_id):
+        """Builds the plant listing filter of an incremental crawl
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+            Returns:
+                {tuple} -- (params to pass to plants_and_equipment_get_all or None for a full crawl,
+                    high-water mark to save once the crawl has been consumed)
+        """
+        if self.metadata_store is None:
+            raise ValueError('incremental crawls require a metadata_store')
+        #Taken from the server's clock with its timezone so a client in another timezone or with a skewed
+        #clock doesn't skip updates, and overlapping the previous crawl to cover plants modified while it ran
+        crawl_started=self.simpro_session.server_time()-datetime.timedelta(seconds=self.modified_since_overlap)
+        modified_since=self.metadata_store.get_high_water_mark(company_id,plant_type_id)
+        params={'DateModified':self.modified_since_filter.format(modified_since)} if modified_since else None
+        logger.debug('Incremental crawl {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type_id)+' modified_since: '+str(modified_since)+'}')
+        return params,crawl_started.isoformat(timespec='seconds')
+
     def get_plant_types(self,company_id,custom_field_names):
         """Finds all trackable Plant Types from a Simpro Company
-        
+
+            Notes:
+                When the class has a metadata_store the plant types are read from it, see get_stored_plant_types.
+
             Arguments:
                 company_id {integer} -- ID of the company to search.
                 custom_field_name {list} -- name of the custom fields to find the ID of.
@@ -134,43 +595,119 @@ class Trackables(object):
                         name:
                     ]}                
         """
+        logger.debug('Getting trackable plant types for company_id: '+ str(company_id))
+        if self.metadata_store is None:
+            plant_types=self.get_plant_type_custom_fields(company_id)
+        else:
+            plant_types=self.get_stored_plant_types(company_id,custom_field_names)
+        custom_field_names=set(custom_field_names)
+        for plant_type in plant_types:
+            results = {
+                'id':plant_type['id'],
+                'custom_fields':[custom_field for custom_field in plant_type['custom_fields'] if custom_field['name'] in custom_field_names]
+            }
+            #Yield a list of all desired custom fields in a dictionary
+            if results['custom_fields']:
+                logger.debug('Successfully Found specified custom_field_names in: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type['id'])+'}')
+                yield results
+            else:
+                logger.debug('Failed to find specified custom_field_names in: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type['id'])+'}')
+
+    def get_plant_type_custom_fields(self,company_id):
+        """Gets every plant type of a company with all of its custom fields from the API
+
+            Arguments:
+                company_id {integer} -- ID of the company
+            Yields:
+                {dictonary} -- {
+                    id: #ID of the plant type
+                    custom_fields:[
+                        id:
+                        name:
+                    ]}
+        """
         #Get all the id's for all plant types
         plant_types=self.simpro_session.plant_type_get_all(
             company_id,
             {'columns':'ID'}
         )
         #Iterate over the retreived plant types
-        logger.debug('Getting trackable plant types for company_id: '+ str(company_id))
-        for plant_type in plant_types.json():
+        for plant_type in itertools.chain.from_iterable(self.simpro_session.json(page) for page in plant_types):
             #Get all the custom fields for a plant type
             plant_custom_fields=self.simpro_session.plant_type_custom_fields_get_all(
                 company_id,
                 plant_type['ID']
                 )
-            
-            results = {
+            yield {
                 'id':plant_type['ID'],
-                'custom_fields':[]
+                'custom_fields':[{
+                        'id':plant_custom_field['ID'],
+                        'name':plant_custom_field.get('Name')
+                    } for plant_custom_field in itertools.chain.from_iterable(self.simpro_session.json(page) for page in plant_custom_fields)]
             }
-            #Iterate over the retreived plant type custom fields
-            for plant_custom_field in plant_custom_fields.json():
-                #Iterate of the custom fields we want to get the ID of.
-                for custom_field_name in custom_field_names:
-                    #check for desired match
-                    if plant_custom_field.get('Name') == custom_field_name:
-                        #append some results
-                        results['custom_fields'].append({
-                                'id':plant_custom_field['ID'],
-                                'name':plant_custom_field['Name']
-                            })
-            #Yield a list of all desired custom fields in a dictionary
-            if results['custom_fields']:
-                logger.debug('Successfully Found specified custom_field_names in: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type['ID'])+'}')
-                yield results
-            else:
-                logger.debug('Failed to find specified custom_field_names in: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type['ID'])+'}')
 
-    def get_equipment(self,company_id,plant_type_id,custom_field_ids):
+    def get_stored_plant_types(self,company_id,custom_field_names):
+        """Finds trackable plant types in the metadata_store
+
+            Notes:
+                A company missing from the store is fetched from the API first.
+                A store older than metadata_max_age is served and refreshed in the background.
+                If a name isn't found and the store is older than metadata_min_age it is refreshed before answering.
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                custom_field_names {list} -- name of the custom fields to find the ID of.
+            Returns:
+                {list} -- Same structure as yielded by get_plant_types
+        """
+        updated=self.metadata_store.updated(company_id)
+        if updated is None:
+            logger.debug('No stored plant types for company_id: '+str(company_id))
+            self.refresh_metadata(company_id)
+            return self.metadata_store.get_plant_types(company_id,custom_field_names)
+        age=time.time()-updated
+        results=self.metadata_store.get_plant_types(company_id,custom_field_names)
+        found={custom_field['name'] for plant_type in results for custom_field in plant_type['custom_fields']}
+        if not set(custom_field_names) <= found and age > self.metadata_min_age:
+            logger.debug('Stored plant types missing custom_field_names for company_id: '+str(company_id))
+            self.refresh_metadata(company_id)
+            results=self.metadata_store.get_plant_types(company_id,custom_field_names)
+        elif age > self.metadata_max_age:
+            self.refresh_metadata_background(company_id)
+        return results
+
+    def refresh_metadata(self,company_id):
+        """Saves every plant type and custom field of a company to the metadata_store
+
+            Arguments:
+                company_id {integer} -- ID of the company
+        """
+        self.metadata_store.save_plant_types(
+            company_id,
+            list(self.get_plant_type_custom_fields(company_id)))
+
+    def refresh_metadata_background(self,company_id):
+        """Refreshes the metadata_store of a company on a daemon thread, once at a time per company
+
+            Arguments:
+                company_id {integer} -- ID of the company
+        """
+        with self.metadata_lock:
+            if company_id in self.metadata_refreshing:
+                return
+            self.metadata_refreshing.add(company_id)
+        def refresh():
+            try:
+                self.refresh_metadata(company_id)
+            except Exception:
+                logger.exception('Failed to refresh stored plant types for company_id: '+str(company_id))
+            finally:
+                with self.metadata_lock:
+                    self.metadata_refreshing.discard(company_id)
+        logger.debug('Refreshing stored plant types in the background for company_id: '+str(company_id))
+        threading.Thread(target=refresh,daemon=True).start()
+
+    def get_equipment(self,company_id,plant_type_id,custom_field_ids,fetch_mode='specific',params=None):
 
         """Finds all trackable equipment from a Simpro Plant
         
@@ -178,6 +715,8 @@ class Trackables(object):
                 company_id {integer} -- ID of the company to search
                 plant_type_id {integer} -- ID of the Plant to search
                 custom_field_id {list} -- list of custom field ids to get the custom field values of
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
+                params {dict} -- Extra params/query options used to filter the plant listing
 
             Yields:                
                 {dictonary} -- {
@@ -194,29 +733,18 @@ class Trackables(object):
         plants_and_equipment=self.simpro_session.plants_and_equipment_get_all(
             company_id,
             plant_type_id,
-            {'columns':'ID'}
+            dict(self.plant_columns(fetch_mode),**(params or {}))
         )
         for pages in plants_and_equipment:
             #Iterate over the equipment in the pages
-                for equipment in pages.json():
-                    #Place to store results per custom_field_ids
-                    custom_fields_results=[]
-                    #Iterate over the list of custom field ids
-                    for custom_field_id in custom_field_ids:                           
-                        #Retreive the specified custom field
-                        custom_field = self.simpro_session.plants_and_equipment_custom_fields_get_specific(
-                            company_id,
-                            plant_type_id,
-                            equipment['ID'],
-                            custom_field_id
-                            )                         
-                        #Just a json ref of the retreived data                 
-                        json_cf=custom_field.json()
-                        #Add an entry to the results list
-                        custom_fields_results.append({
-                            'id':json_cf['CustomField']['ID'],
-                            'name':json_cf['CustomField']['Name'],
-                            'value':json_cf['Value']})
+                for equipment in self.simpro_session.json(pages):
+                    custom_fields_results=self.get_equipment_custom_fields(
+                        company_id,
+                        plant_type_id,
+                        equipment,
+                        custom_field_ids,
+                        fetch_mode
+                    )
                     #If their are results yield them
                     if custom_fields_results:
                         logger.debug('Successfully found custom_field_ids: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type_id)+' plant_id: '+str(equipment['ID'])+'}')                   
@@ -228,7 +756,91 @@ class Trackables(object):
                     else:
                         logger.debug('Failed to find custom_field_ids: {company_id: '+str(company_id)+' plant_type_id: '+str(plant_type_id)+' plant_id: '+str(equipment['ID'])+'}')
 
-    def get_equipment_chunks(self,plant_ids,company_id,plant_type_id,custom_field_ids):
+    def plant_columns(self,fetch_mode):
+        """Params to list plants with for the given fetch_mode
+
+            Arguments:
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
+            Returns:
+                {dict} -- params to pass to plants_and_equipment_get_all
+        """
+        if fetch_mode == 'columns':
+            return {'columns':'ID,CustomFields'}
+        return {'columns':'ID'}
+
+    def get_equipment_custom_fields(self,company_id,plant_type_id,plant,custom_field_ids,fetch_mode='specific'):
+        """Gets the values of the specified custom fields of a plant
+
+            Arguments:
+                company_id {integer} -- ID of the company
+                plant_type_id {integer} -- ID of the plant type
+                plant {dict} -- plant as returned by plants_and_equipment_get_all E.G. {'ID': 123}
+                custom_field_ids {list} -- custom field ids to get the values of
+                fetch_mode {string} -- How the custom field values are retrieved:
+                    'specific' -- one request per custom field per plant
+                    'batch' -- one request per page of a plant's custom fields, filtered locally
+                    'columns' -- no requests, reads the CustomFields column of the plant listing
+            Returns:
+                {list} -- [{
+                    id:
+                    name:
+                    value:
+                }]
+        """
+        if fetch_mode == 'specific':
+            custom_fields=[]
+            #Iterate over the list of custom field ids
+            for custom_field_id in custom_field_ids:
+                #Retreive the specified custom field
+                custom_field = self.simpro_session.plants_and_equipment_custom_fields_get_specific(
+                    company_id,
+                    plant_type_id,
+                    plant['ID'],
+                    custom_field_id
+                    )
+                custom_fields.append(self.simpro_session.json(custom_field))
+        elif fetch_mode == 'batch':
+            custom_fields=[]
+            #Follow pagination, a plant can have more custom fields than fit on one page
+            for page in self.simpro_session.plants_and_equipment_custom_fields_get_pages(
+                company_id,
+                plant_type_id,
+                plant['ID']
+                ):
+                custom_fields.extend(self.simpro_session.json(page) or [])
+        elif fetch_mode == 'columns':
+            custom_fields=plant.get('CustomFields') or []
+        else:
+            raise ValueError('Unknown fetch_mode: '+str(fetch_mode))
+        return self.format_custom_fields(custom_fields,custom_field_ids)
+
+    @staticmethod
+    def format_custom_fields(custom_fields,custom_field_ids):
+        """Filters a plants custom fields down to the specified ids
+
+            Arguments:
+                custom_fields {list} -- plant custom fields as returned by Simpro [{'CustomField':{'ID':,'Name':},'Value':}]
+                custom_field_ids {list} -- custom field ids to keep, results follow this order
+            Returns:
+                {list} -- [{
+                    id:
+                    name:
+                    value:
+                }]
+        """
+        #Index the custom fields by ID so each wanted field is a single lookup
+        custom_fields_by_id={json_cf['CustomField']['ID']:json_cf for json_cf in custom_fields if json_cf}
+        results=[]
+        for custom_field_id in custom_field_ids:
+            json_cf=custom_fields_by_id.get(custom_field_id)
+            if json_cf:
+                results.append({
+                    'id':json_cf['CustomField']['ID'],
+                    'name':json_cf['CustomField']['Name'],
+                    'value':json_cf['Value']})
+        return results
+
+    def get_equipment_chunks(self,plant_ids,company_id,plant_type_id,custom_field_ids,fetch_mode='specific'):
         """Gets equipment based on provided list of plant_ids
         
             Arguments:
@@ -236,6 +848,7 @@ class Trackables(object):
                 company_id {int} -- company to look under
                 plant_type_id {int} -- plant_type to look under
                 custom_field_ids {list} -- custom field ids to lookup/return
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
             returns:
                 {list} -- [{
                     id: #ID of the equipment
@@ -249,23 +862,13 @@ class Trackables(object):
 
         results=[]
         for plant_id in plant_ids:
-            custom_fields_results=[]
-            #Iterate over the list of custom field ids
-            for custom_field_id in custom_field_ids:                         
-                #Retreive the specified custom field
-                custom_field = self.simpro_session.plants_and_equipment_custom_fields_get_specific(
-                    company_id,
-                    plant_type_id,
-                    plant_id['ID'],
-                    custom_field_id
-                    )                         
-                #Just a json ref of the retreived data                 
-                json_cf=custom_field.json()
-                #Add an entry to the results list
-                custom_fields_results.append({
-                    'id':json_cf['CustomField']['ID'],
-                    'name':json_cf['CustomField']['Name'],
-                    'value':json_cf['Value']})
+            custom_fields_results=self.get_equipment_custom_fields(
+                company_id,
+                plant_type_id,
+                plant_id,
+                custom_field_ids,
+                fetch_mode
+            )
             #If their are results return them
             if custom_fields_results:
                 output={
@@ -279,57 +882,156 @@ class Trackables(object):
         if results:
             return results
 
-    def get_equipment_concurrent(self,company_id,plant_type_id,custom_field_ids,max_workers=None,chunk_size=None):
-        """ Gets equipment using the concurrent futures module.
+    def get_equipment_concurrent(self,company_id,plant_type_id,custom_field_ids,max_workers=None,chunk_size=None,fetch_mode='specific',params=None):
+        """ Gets equipment using a thread pool sharing the pooled session.
+
+            Notes:
+                Plants are handed to the workers in small chunks as the plant pages arrive,
+                so a slow plant only holds up its own chunk. Results are yielded as they complete,
+                not in plant order.
+
             Arguments:
                 company_id {int} -- company id
                 plant_type_id {int} -- plant type id 
                 custom_field_ids {list} -- custom field ids to return E.G. [13,25]
-                max_workers {int} -- Number of works to spawn, more then 4 causes connection errors
-                chunk_size {int} -- Size of the plant chunks passed to the spawned workers, leave none for even split.
+                max_workers {int} -- Number of worker threads, defaults to the max_workers of the class.
+                    Keep it at or below the connection pool size of the session.
+                chunk_size {int} -- Number of plants in each unit of work, defaults to 1.
+                fetch_mode {string} -- How custom field values are retrieved, see get_equipment_custom_fields
+                params {dict} -- Extra params/query options used to filter the plant listing
             Yields:
-                {list} -- [{
+                {dictonary} -- {
                     id: #ID of the equipment
                     custom_fields:[{ #list of custom fields
                         id:
                         name:
                         value:
                     }]
-                }]
+                }
         """
         #Get all plants under a plant type
         plants_and_equipment=self.simpro_session.plants_and_equipment_get_all(
             company_id,
             plant_type_id,
-            {'columns':'ID'}
+            dict(self.plant_columns(fetch_mode),**(params or {}))
         )
-        #Place all plant ID's into one list
-        plant_ids=[]
-        [plant_ids.extend(i.json()) for i in plants_and_equipment]
         #Check for optional variables
-        max_workers=4 if not max_workers else max_workers
-        chunk_size=len(plant_ids)//max_workers if not chunk_size else chunk_size
-
-        #List to hold results
-        results=[]
-        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        max_workers=self.worker_count(max_workers)
+        chunk_size=1 if not chunk_size else chunk_size
+        #Lazily split the plants into chunks as the pages arrive
+        plant_ids=(plant for page in plants_and_equipment for plant in self.simpro_session.json(page))
+        chunks=self.split_iterable(plant_ids,chunk_size)
+        total_results=0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             logger.debug('Starting concurrent futures chunk_size:'+str(chunk_size)+' max_workers:'+str(max_workers))
-            #Split the list of plant ids into chunks
-            x=self.split_iterable(plant_ids,chunk_size)
-            #For each chunk create a future object to be proccesses
-            futures=[executor.submit(
-                self.get_equipment_chunks,
-                i,
-                company_id,
-                plant_type_id,
-                custom_field_ids) for i in list(x)]
-            #Wait for the futures to be completed and extend thhe results list
-            for future in concurrent.futures.as_completed(futures):
-                results.extend(future.result())
-        logger.debug('Finished concurrent futures: Total input IDs: '+str(len(plant_ids))+' Total results: '+str(len(results)))
-        return results
+            futures=set()
+            try:
+                for chunk in chunks:
+                    futures.add(executor.submit(
+                        self.get_equipment_chunks,
+                        chunk,
+                        company_id,
+                        plant_type_id,
+                        custom_field_ids,
+                        fetch_mode))
+                    #Keep the queue short so memory stays bounded and results flow while plants are listed
+                    if len(futures) >= max_workers*2:
+                        done,futures=concurrent.futures.wait(futures,return_when=concurrent.futures.FIRST_COMPLETED)
+                        for future in done:
+                            for result in future.result() or []:
+                                total_results += 1
+                                yield result
+                for future in concurrent.futures.as_completed(futures):
+                    for result in future.result() or []:
+                        total_results += 1
+                        yield result
+            finally:
+                for future in futures:
+                    future.cancel()
+        logger.debug('Finished concurrent futures: Total results: '+str(total_results))
+
+    def update_custom_fields(self,updates,max_workers=None,known_values=None):
+        """Patches plant custom field values concurrently, skipping values that are unchanged
+
+            Notes:
+                A value is skipped when it equals the update's last_value or its entry in known_values,
+                values are compared as given so None and 'None' or 1 and '1' differ.
+                known_values is updated after every successful patch so it can be reused by later runs.
+                Summaries are yielded as the updates complete, not in input order.
+
+            Arguments:
+                updates {iterable} -- [{
+                    company_id:, #ID of the company
+                    plant_type_id:, #ID of the plant type
+                    plant_id:, #ID of the plant
+                    custom_field_id:, #ID of the custom field
+                    value:, #Value to write
+                    last_value:, #Optional last known value of the custom field
+                }]
+                max_workers {int} -- Number of patches in flight at once, defaults to the max_workers of the class
+                known_values {dict} -- Optional last known values {(company_id,plant_type_id,plant_id,custom_field_id):value}
+            Yields:
+                {dictonary} -- {
+                    update:{}, #The update
+                    status:'', #succeeded, skipped or failed
+                    status_code:, #Status code of the patch, None when skipped or not sent
+                    error:'', #Error of a failed patch
+                }
+        """
+        max_workers=self.worker_count(max_workers)
+        known_values=known_values if known_values is not None else {}
+        counts={'succeeded':0,'skipped':0,'failed':0}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures=set()
+            try:
+                for update in updates:
+                    key=(update['company_id'],update['plant_type_id'],update['plant_id'],update['custom_field_id'])
+                    last_value=update['last_value'] if 'last_value' in update else known_values.get(key,self.unknown_value)
+                    if last_value is not self.unknown_value and last_value == update['value']:
+                        counts['skipped'] += 1
+                        yield {'update':update,'status':'skipped','status_code':None,'error':None}
+                        continue
+                    futures.add(executor.submit(self.update_custom_field,update,known_values))
+                    if len(futures) >= max_workers*2:
+                        done,futures=concurrent.futures.wait(futures,return_when=concurrent.futures.FIRST_COMPLETED)
+                        for future in done:
+                            counts[future.result()['status']] += 1
+                            yield future.result()
+                for future in concurrent.futures.as_completed(futures):
+                    counts[future.result()['status']] += 1
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+        logger.debug('Finished custom field updates: '+str(counts))
+
+    def update_custom_field(self,update,known_values):
+        """Patches a single plant custom field value, used by update_custom_fields
+
+            Arguments:
+                update {dict} -- see update_custom_fields
+                known_values {dict} -- last known values, updated when the patch succeeds
+            Returns:
+                {dictonary} -- summary, see update_custom_fields
+        """
+        try:
+            results=self.simpro_session.plants_and_equipment_custom_fields_patch_specific(
+                update['company_id'],
+                update['plant_type_id'],
+                update['plant_id'],
+                update['custom_field_id'],
+                json={'Value':update['value']}
+            )
+        except Error as e:
+            logger.debug('Failed to update custom field: '+str(update)+' '+repr(e))
+            return {'update':update,'status':'failed','status_code':getattr(e,'status_code',None),'error':repr(e)}
+        except requests.exceptions.RequestException as e:
+            logger.debug('Failed to update custom field: '+str(update)+' '+repr(e))
+            return {'update':update,'status':'failed','status_code':None,'error':repr(e)}
+        known_values[(update['company_id'],update['plant_type_id'],update['plant_id'],update['custom_field_id'])]=update['value']
+        return {'update':update,'status':'succeeded','status_code':results.status_code,'error':None}
 
-    def compare_equipment(self, company_id,plant_type_id,plant_data,match_data,match_serial_field,match_return_fields,simpro_serial_custom_field,simpro_return_custom_fields):
+    def compare_equipment(self, company_id,plant_type_id,plant_data,match_data,match_serial_field,match_return_fields,simpro_serial_custom_field,simpro_return_custom_fields,normalize=None):
         """compare trackable data against another source return what's specififed
         
             Arguments:
@@ -342,7 +1044,8 @@ class Trackables(object):
                             id:{integer},
                             name:{string},
                             value:}]}
-                match_data {list} -- List containing a dictionary's to iterate against simpro data
+                match_data {list|MatchIndex} -- List containing a dictionary's to iterate against simpro data,
+                    or a MatchIndex built from it to reuse across calls
                 [
                     {key:value}
                 ]
@@ -350,6 +1053,7 @@ class Trackables(object):
                 match_return_fields {list} -- Keys in match_date that you want returned
                 simpro_serial_custom_field {string} -- Name of the custom field to compare against
                 simpro_return_custom_fields {list} -- Custom fields to return when a match is found
+                normalize {callable} -- Optional function applied to serials before matching, see MatchIndex
             Yields:
                 {dictonary} -- {
                     company_id:'',
@@ -365,23 +1069,54 @@ class Trackables(object):
                     }
                 }
         """
+        #Index the match data once so each serial is a single lookup
+        if not isinstance(match_data,MatchIndex):
+            match_data=MatchIndex(match_data,match_serial_field,normalize)
+        match_return_fields=set(match_return_fields)
+        simpro_return_custom_fields=set(simpro_return_custom_fields)
         #Iterate over the plants in the data input
         for plant in plant_data:
             #Iterate over the custom fields in each plant
             for custom_field in plant['custom_fields']:
-                #Get the index for the match_date and store it
-                match_serial_field_index=None
-                for i,x in enumerate(match_data):
-                    if x[match_serial_field]==custom_field['value']:
-                        match_serial_field_index=i
-                #If the name of the custom field and match serial are the same and a match index is presend continue.
-                if custom_field['name'] == simpro_serial_custom_field and match_serial_field_index:
+                #Only the serial custom field is matched
+                if custom_field['name'] != simpro_serial_custom_field:
+                    continue
+                match_row=match_data.get(custom_field['value'])
+                if match_row is not None:
                     #Setup of the dictionary that may be returned
                     match_result = {
                         'company_id':company_id,
                         'plant_type_id':plant_type_id,
                         'plant_id':plant['id'],
                         'plant_custom_fields':[i for i in plant['custom_fields'] if i['name'] in simpro_return_custom_fields],
-                        'match_returned_custom_fields':{k:v for (k,v) in match_data[match_serial_field_index].items() if k in match_return_fields}
+                        'match_returned_custom_fields':{k:v for (k,v) in match_row.items() if k in match_return_fields}
                     }
                     yield match_result
+
+    def compare_equipment_bulk(self,trackable_companies,match_data,match_serial_field,match_return_fields,simpro_serial_custom_field,simpro_return_custom_fields,normalize=None):
+        """compare every plant returned by get_companies against another source in one pass
+
+            Arguments:
+                trackable_companies {iterable} -- companies as yielded by get_companies
+                match_data {list|MatchIndex} -- see compare_equipment, indexed once for all plants
+                match_serial_field {string} -- key in match_data to match against.
+                match_return_fields {list} -- Keys in match_date that you want returned
+                simpro_serial_custom_field {string} -- Name of the custom field to compare against
+                simpro_return_custom_fields {list} -- Custom fields to return when a match is found
+                normalize {callable} -- Optional function applied to serials before matching, see MatchIndex
+            Yields:
+                {dictonary} -- Same structure as yielded by compare_equipment
+        """
+        if not isinstance(match_data,MatchIndex):
+            match_data=MatchIndex(match_data,match_serial_field,normalize)
+        for company in trackable_companies:
+            for trackable_plant_type in company['trackable_plants']:
+                yield from self.compare_equipment(
+                    company['id'],
+                    trackable_plant_type['id'],
+                    trackable_plant_type.get('trackable_plant',[]),
+                    match_data,
+                    match_serial_field,
+                    match_return_fields,
+                    simpro_serial_custom_field,
+                    simpro_return_custom_fields)
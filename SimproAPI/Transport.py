@@ -0,0 +1,59 @@
+import requests
+import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class Transport(object):
+    """Pooled HTTP transport that Sessions, Trackables, OAuth2 and TokenManager can share
+
+        Notes:
+            Holds one requests.Session with a single HTTPAdapter, so keep-alive connections
+            are reused by every class and thread sharing it. Size pool_maxsize to the
+            number of threads making requests at once.
+            Authorization headers are sent per request, never set on the shared session.
+    """
+    def __init__(self,pool_connections=10,pool_maxsize=10,max_retries=None):
+        """
+            Arguments:
+                pool_connections {int} -- Number of hosts to keep connection pools for
+                pool_maxsize {int} -- Number of keep-alive connections kept open per host
+                max_retries {Retry} -- urllib3 retry policy, defaults to 5 retries with a 0.5 backoff_factor
+        """
+        self.pool_connections=pool_connections
+        self.pool_maxsize=pool_maxsize
+        self.session=requests.Session()
+        adapter=HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries if max_retries is not None else Retry(
+                total=5,
+                backoff_factor=0.5,
+                #429 / Retry-After are handled in Sessions.send so the rate_limiter sees them
+                respect_retry_after_header=False))
+        self.session.mount('https://',adapter)
+        self.session.mount('http://',adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exec_types,exec_val,exc_tb):
+        self.close()
+
+    def request(self,method,url,**kwargs):
+        """Sends a request over the pooled session
+
+            Arguments:
+                method {string} -- HTTP method
+                url {string} -- Full url of the request
+                kwargs -- Passed through to requests
+            Returns:
+                requests object
+        """
+        return self.session.request(method,url,**kwargs)
+
+    def close(self):
+        """Closes every pooled connection"""
+        self.session.close()
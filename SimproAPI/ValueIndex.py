@@ -0,0 +1,221 @@
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug('Importing Module : '+__name__)
+
+class ValueIndex(object):
+    """Local sqlite index of custom field values, finds the plants with a value without any API calls
+
+        Notes:
+            Maps (custom field name, value) -> (company, plant type, plant, custom field ID).
+            Fill it from crawl results with update, an incremental crawl then only rewrites the
+            plants that changed. Plants deleted in Simpro are only dropped by update of a full
+            crawl with prune or by remove_plant.
+            Unlike MetadataStore one connection is kept open so lookups don't pay for opening it,
+            close it with close or use the index as a context manager.
+            Use the same normalize every time an index file is opened.
+    """
+    def __init__(self,save_location=None,normalize=None,batch_size=1000):
+        """
+            Arguments:
+                save_location {string} -- Location of the sqlite file, defaults to simpro_values.sqlite.
+                    ':memory:' keeps the index in memory.
+                normalize {callable} -- Optional function applied to values when indexing and looking up,
+                    E.G. MatchIndex.normalize_serial to ignore case and surrounding whitespace
+                batch_size {int} -- Number of plants written in each transaction by update
+        """
+        self.save_location='simpro_values.sqlite' if not save_location else save_location
+        self.normalize=normalize
+        self.batch_size=batch_size
+        self.lock=threading.Lock()
+        self.connection=sqlite3.connect(self.save_location,timeout=30,check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript('''
+                CREATE TABLE IF NOT EXISTS field_values (
+                    company_id INTEGER NOT NULL,
+                    plant_type_id INTEGER NOT NULL,
+                    plant_id INTEGER NOT NULL,
+                    custom_field_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (company_id,plant_type_id,plant_id,custom_field_id)
+                );
+                CREATE INDEX IF NOT EXISTS field_values_value ON field_values (name,value);
+                CREATE TEMP TABLE IF NOT EXISTS lookup_values (
+                    value TEXT PRIMARY KEY
+                );
+            ''')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exec_types,exec_val,exc_tb):
+        self.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM field_values').fetchone()[0]
+
+    def close(self):
+        """Closes the connection to the index"""
+        with self.lock:
+            self.connection.close()
+
+    def key(self,value):
+        """Indexed form of a value"""
+        return str(self.normalize(value) if self.normalize else value)
+
+    @staticmethod
+    def plants(records):
+        """Flattens records into plants
+
+            Arguments:
+                records {iterable} -- Records yielded by Trackables.get_companies_stream or companies
+                    yielded by Trackables.get_companies
+            Yields:
+                {tuple} -- (company_id,plant_type_id,plant_id,custom_fields)
+        """
+        for record in records:
+            if 'trackable_plants' in record:
+                for plant_type in record['trackable_plants']:
+                    for plant in plant_type['trackable_plant']:
+                        yield record['id'],plant_type['id'],plant['id'],plant['custom_fields']
+            else:
+                yield record['company_id'],record['plant_type_id'],record['plant_id'],record['custom_fields']
+
+    def update(self,records,prune=False,company_ids=None,custom_field_names=None):
+        """Indexes the custom fields of plants, replacing what was indexed for those fields before
+
+            Notes:
+                Custom fields without a value aren't indexed. Custom fields of a plant that aren't
+                in its record are left as they are, so crawls of different custom fields can share an index.
+                Prune only sees the companies and custom fields in the records unless they are passed,
+                pass them when a company or custom field may have no plants left.
+
+            Arguments:
+                records {iterable} -- Records yielded by Trackables.get_companies_stream or companies
+                    yielded by Trackables.get_companies, E.G. of an incremental crawl
+                prune {bool} -- The records are a full crawl, indexed values of its companies and custom
+                    fields whose plant wasn't in it are removed, including whole plant types
+                company_ids {list} -- Companies the full crawl was of, defaults to those in the records
+                custom_field_names {list} -- Custom fields the full crawl was of, defaults to those in the records
+            Returns:
+                {int} -- Number of plants indexed
+        """
+        plants=self.plants(records)
+        seen=set()
+        seen_company_ids=set()
+        seen_names=set()
+        count=0
+        while True:
+            batch=[plant for _,plant in zip(range(self.batch_size),plants)]
+            if not batch:
+                break
+            with self.lock, self.connection:
+                self.connection.executemany(
+                    'DELETE FROM field_values WHERE company_id=? AND plant_type_id=? AND plant_id=? AND custom_field_id=?',
+                    [(company_id,plant_type_id,plant_id,custom_field['id'])
+                        for company_id,plant_type_id,plant_id,custom_fields in batch
+                        for custom_field in custom_fields])
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO field_values (company_id,plant_type_id,plant_id,custom_field_id,name,value) VALUES (?,?,?,?,?,?)',
+                    [(company_id,plant_type_id,plant_id,custom_field['id'],custom_field['name'],self.key(custom_field['value']))
+                        for company_id,plant_type_id,plant_id,custom_fields in batch
+                        for custom_field in custom_fields
+                        if custom_field.get('value') not in (None,'')])
+            if prune:
+                for company_id,plant_type_id,plant_id,custom_fields in batch:
+                    seen.add((company_id,plant_type_id,plant_id))
+                    seen_company_ids.add(company_id)
+                    seen_names.update(custom_field['name'] for custom_field in custom_fields)
+            count += len(batch)
+        if prune:
+            self.prune(
+                seen,
+                seen_company_ids if company_ids is None else company_ids,
+                seen_names if custom_field_names is None else custom_field_names)
+        logger.debug('Indexed the custom fields of '+str(count)+' plants')
+        return count
+
+    def prune(self,plants,company_ids,custom_field_names):
+        """Removes the values of custom fields of companies whose plant isn't in plants
+
+            Arguments:
+                plants {set} -- (company_id,plant_type_id,plant_id) of every plant still in Simpro
+                company_ids {iterable} -- Companies to prune
+                custom_field_names {iterable} -- Custom fields to prune
+        """
+        custom_field_names=list(custom_field_names)
+        if not custom_field_names:
+            return
+        placeholders=','.join('?'*len(custom_field_names))
+        with self.lock, self.connection:
+            for company_id in company_ids:
+                stale=[row for row in self.connection.execute(
+                    'SELECT DISTINCT company_id,plant_type_id,plant_id,name FROM field_values WHERE company_id=? AND name IN ('+placeholders+')',
+                    [company_id]+custom_field_names) if row[:3] not in plants]
+                self.connection.executemany(
+                    'DELETE FROM field_values WHERE company_id=? AND plant_type_id=? AND plant_id=? AND name=?',stale)
+                if stale:
+                    logger.debug('Pruned '+str(len(stale))+' custom field values from the value index: {company_id: '+str(company_id)+'}')
+
+    def remove_plant(self,company_id,plant_type_id,plant_id):
+        """Removes a plant from the index"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM field_values WHERE company_id=? AND plant_type_id=? AND plant_id=?',
+                (company_id,plant_type_id,plant_id))
+
+    def clear(self):
+        """Removes every plant from the index"""
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM field_values')
+
+    def lookup(self,name,value):
+        """Finds the plants with a custom field value
+
+            Arguments:
+                name {string} -- Name of the custom field, E.G. Serial
+                value -- Value to look up
+            Returns:
+                {list} -- [{company_id:, plant_type_id:, plant_id:, custom_field_id:}]
+        """
+        with self.lock:
+            rows=self.connection.execute(
+                'SELECT company_id,plant_type_id,plant_id,custom_field_id FROM field_values WHERE name=? AND value=?',
+                (name,self.key(value))).fetchall()
+        return [self.result(row) for row in rows]
+
+    def lookup_many(self,name,values):
+        """Finds the plants of many custom field values in one indexed query
+
+            Arguments:
+                name {string} -- Name of the custom field, E.G. Serial
+                values {iterable} -- Values to look up
+            Returns:
+                {dictionary} -- {value:[{company_id:, plant_type_id:, plant_id:, custom_field_id:}]},
+                    values without plants are left out
+        """
+        keys={}
+        for value in values:
+            keys.setdefault(self.key(value),[]).append(value)
+        results={}
+        with self.lock, self.connection:
+            self.connection.executemany('INSERT OR IGNORE INTO lookup_values (value) VALUES (?)',((key,) for key in keys))
+            try:
+                rows=self.connection.execute(
+                    'SELECT field_values.value,company_id,plant_type_id,plant_id,custom_field_id FROM lookup_values '
+                    'JOIN field_values ON field_values.name=? AND field_values.value=lookup_values.value',
+                    (name,)).fetchall()
+            finally:
+                self.connection.execute('DELETE FROM lookup_values')
+        for row in rows:
+            for value in keys[row[0]]:
+                results.setdefault(value,[]).append(self.result(row[1:]))
+        return results
+
+    @staticmethod
+    def result(row):
+        return {'company_id':row[0],'plant_type_id':row[1],'plant_id':row[2],'custom_field_id':row[3]}
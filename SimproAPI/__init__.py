@@ -1,6 +1,23 @@
+from .Transport import Transport
 from .OAuth2 import OAuth2
 from .Trackables import Trackables
 from .Sessions import Sessions
 from .TokenManager import TokenManager
+from .TokenProvider import TokenProvider
+from .RateLimiter import RateLimiter
+from .ResponseCache import ResponseCache
+from .MetadataStore import MetadataStore
+from .CrawlCheckpoint import CrawlCheckpoint
+from .MatchIndex import MatchIndex
+from .ValueIndex import ValueIndex
+from .Metrics import Metrics
+from .JsonDecoder import JsonDecoder
+from .Exporter import Exporter
+from .SingleFlight import SingleFlight
+from .LatencyTracker import LatencyTracker
+from .HedgePolicy import HedgePolicy
+from .TimeoutPolicy import TimeoutPolicy
+from .AsyncSessions import AsyncSessions
+from .AsyncTrackables import AsyncTrackables
 
-__version__='0.1.08'
\ No newline at end of file
+__version__='0.2.0'
\ No newline at end of file
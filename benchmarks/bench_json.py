@@ -0,0 +1,52 @@
+"""Benchmarks the JsonDecoder backends on Simpro shaped pages
+
+Decodes full pages of plants with their custom fields, the largest bodies a crawl receives.
+
+    python benchmarks/bench_json.py --plants 250 --repeat 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+from SimproAPI import JsonDecoder
+import mock_server
+
+def page_bodies(plants):
+    """Encoded bodies of a page of plants with custom field columns and a page of custom fields"""
+    config=mock_server.MockConfig(plants=plants)
+    return {
+        'plants with CustomFields':json.dumps([
+            {'ID':plant_id,'CustomFields':config.plant_custom_fields(1,plant_id)}
+            for plant_id in range(1,plants+1)]).encode(),
+        'plant custom fields':json.dumps(config.plant_custom_fields(1,1)).encode(),
+    }
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plants',type=int,default=250,help='Plants per page')
+    parser.add_argument('--repeat',type=int,default=2000,help='Times each body is decoded')
+    args=parser.parse_args()
+
+    backends=JsonDecoder.available()
+    print('Installed backends: '+', '.join(backends))
+    print('{0:<26}{1:<10}{2:>12}{3:>10}{4:>10}'.format('body','backend','us/decode','MB/s','speedup'))
+    for name,body in page_bodies(args.plants).items():
+        baseline=None
+        for backend in reversed(backends):
+            loads=JsonDecoder(backend).loads
+            loads(body)
+            start=time.perf_counter()
+            for _ in range(args.repeat):
+                loads(body)
+            elapsed=(time.perf_counter()-start)/args.repeat
+            baseline=baseline or elapsed
+            print('{0:<26}{1:<10}{2:>12.1f}{3:>10.1f}{4:>9.2f}x'.format(
+                name,backend,elapsed*1e6,len(body)/elapsed/1e6,baseline/elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Benchmarks Trackables crawls against the local mock Simpro server
+
+Every mode is timed at every size in a fresh process, so peak RSS belongs to that run only.
+The mock server runs in its own process and counts the requests it serves.
+
+    python benchmarks/bench_trackables.py --sizes 100,1000 --latency 0.01
+    python benchmarks/bench_trackables.py --output results.json
+    python benchmarks/bench_trackables.py --baseline results.json --tolerance 0.2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import urllib.request
+import logging
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+import mock_server
+
+logger = logging.getLogger(__name__)
+
+CUSTOM_FIELD_NAMES=['Serial','Location']
+
+def peak_rss():
+    """Peak resident set size of this process in MiB, None where resource is unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Linux reports KiB, macOS bytes
+    return peak/(1024*1024) if sys.platform == 'darwin' else peak/1024
+
+def count_company_plants(companies):
+    return sum(len(plant_type['trackable_plant']) for company in companies for plant_type in company['trackable_plants'])
+
+def crawl_get_companies(url,company_ids,concurrently,fetch_mode):
+    import SimproAPI
+    with SimproAPI.Trackables(url,'benchmark') as trackables:
+        return count_company_plants(trackables.get_companies(company_ids,CUSTOM_FIELD_NAMES,concurrently=concurrently,fetch_mode=fetch_mode))
+
+def crawl_stream(url,company_ids,fetch_mode):
+    import SimproAPI
+    with SimproAPI.Trackables(url,'benchmark') as trackables:
+        return sum(1 for record in trackables.get_companies_stream(company_ids,CUSTOM_FIELD_NAMES,concurrently=True,fetch_mode=fetch_mode))
+
+def crawl_async(url,company_ids,fetch_mode):
+    import asyncio
+    import SimproAPI
+    async def crawl():
+        async with SimproAPI.AsyncTrackables(url,'benchmark') as trackables:
+            return count_company_plants([company async for company in trackables.get_companies(company_ids,CUSTOM_FIELD_NAMES,fetch_mode=fetch_mode)])
+    return asyncio.run(crawl())
+
+def async_available():
+    try:
+        import aiohttp
+    except ImportError:
+        return False
+    return True
+
+#name: (crawl function, extra arguments)
+MODES={
+    'sequential':(crawl_get_companies,(False,'specific')),
+    'concurrent':(crawl_get_companies,(True,'specific')),
+    'batch':(crawl_get_companies,(True,'batch')),
+    'columns':(crawl_get_companies,(True,'columns')),
+    'stream':(crawl_stream,('columns',)),
+    'async':(crawl_async,('columns',)),
+}
+
+def run_case(mode,url,company_ids,results):
+    """Runs one crawl in a child process and reports wall time, plants found and peak RSS"""
+    crawl,arguments=MODES[mode]
+    try:
+        start=time.perf_counter()
+        plants=crawl(url,company_ids,*arguments)
+        results.put({'wall_time':time.perf_counter()-start,'plants':plants,'peak_rss_mib':peak_rss()})
+    except Exception as error:
+        results.put({'error':repr(error)})
+
+def server_stats(url):
+    with urllib.request.urlopen(url+'/_stats') as response:
+        return json.loads(response.read())
+
+def start_server(context,config):
+    ready=context.Queue()
+    process=context.Process(target=mock_server.serve,args=(config,ready),daemon=True)
+    process.start()
+    return process,ready.get(timeout=30)
+
+def benchmark(context,mode,size,args):
+    """Benchmarks one mode at one size against a fresh mock server"""
+    config=mock_server.MockConfig(
+        companies=args.companies,
+        plant_types=args.plant_types,
+        plants=size,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit)
+    server,url=start_server(context,config)
+    try:
+        results=context.Queue()
+        process=context.Process(target=run_case,args=(mode,url,list(range(args.companies)),results))
+        process.start()
+        result=results.get(timeout=args.timeout)
+        process.join()
+        result.update(server_stats(url))
+    finally:
+        server.terminate()
+        server.join()
+    result.update(mode=mode,size=size)
+    if 'wall_time' in result:
+        result['requests_per_second']=result['requests']/result['wall_time'] if result['wall_time'] else 0.0
+    return result
+
+def print_result(result):
+    if 'error' in result:
+        print('{mode:<12}{size:>9}  error: {error}'.format(**result))
+        return
+    print('{mode:<12}{size:>9}{plants:>9}{requests:>10}{wall_time:>10.2f}{requests_per_second:>10.0f}{peak_rss:>10}{rate_limited:>8}{errors:>8}'.format(
+        peak_rss='-' if result['peak_rss_mib'] is None else '{0:.1f}'.format(result['peak_rss_mib']),
+        **result))
+
+def compare(results,baseline,tolerance):
+    """Lists every case whose wall time regressed by more than tolerance against the baseline"""
+    previous={(result['mode'],result['size']):result for result in baseline if 'wall_time' in result}
+    regressions=[]
+    for result in results:
+        old=previous.get((result['mode'],result['size']))
+        if old is None or 'wall_time' not in result:
+            continue
+        if result['wall_time'] > old['wall_time']*(1+tolerance):
+            regressions.append('{0} {1}: {2:.2f}s was {3:.2f}s'.format(result['mode'],result['size'],result['wall_time'],old['wall_time']))
+    return regressions
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes',default=','.join(MODES),help='Comma separated modes: '+', '.join(MODES))
+    parser.add_argument('--sizes',default='100,1000,10000,100000',help='Comma separated total plant counts')
+    parser.add_argument('--companies',type=int,default=1)
+    parser.add_argument('--plant-types',type=int,default=4)
+    parser.add_argument('--latency',type=float,default=0.0,help='Seconds added to every request')
+    parser.add_argument('--jitter',type=float,default=0.0,help='Extra random delay of up to this many seconds')
+    parser.add_argument('--error-rate',type=float,default=0.0,help='Fraction of connections dropped')
+    parser.add_argument('--rate-limit',type=float,default=None,help='Requests per second before 429 responses')
+    parser.add_argument('--timeout',type=float,default=3600,help='Seconds a single case may run')
+    parser.add_argument('--output',help='Write the results to this json file')
+    parser.add_argument('--baseline',help='Fail if any case is slower than in this results file')
+    parser.add_argument('--tolerance',type=float,default=0.1,help='Allowed fractional slowdown against the baseline')
+    args=parser.parse_args()
+
+    modes=args.modes.split(',')
+    for mode in modes:
+        if mode not in MODES:
+            parser.error('Unknown mode: '+mode)
+    if 'async' in modes and not async_available():
+        print('Skipping async, aiohttp is not installed')
+        modes.remove('async')
+    sizes=[int(size) for size in args.sizes.split(',')]
+
+    context=multiprocessing.get_context('spawn')
+    print('{0:<12}{1:>9}{2:>9}{3:>10}{4:>10}{5:>10}{6:>10}{7:>8}{8:>8}'.format(
+        'mode','size','plants','requests','wall s','req/s','rss MiB','429s','drops'))
+    results=[]
+    for size in sizes:
+        for mode in modes:
+            result=benchmark(context,mode,size,args)
+            print_result(result)
+            results.append(result)
+
+    if args.output:
+        with open(args.output,'w') as output:
+            json.dump(results,output,indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions=compare(results,json.load(baseline),args.tolerance)
+        for regression in regressions:
+            print('Regression: '+regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
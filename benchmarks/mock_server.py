@@ -0,0 +1,230 @@
+"""Local stand-in for the Simpro API used by the benchmarks
+
+Serves companies, plant types, paginated plants with Result-Pages headers and custom
+fields. Plants are generated on request so 100k plants cost no memory.
+Run it on its own with: python benchmarks/mock_server.py --plants 1000 --latency 0.02
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import logging
+from http.server import ThreadingHTTPServer,BaseHTTPRequestHandler
+from urllib.parse import urlparse,parse_qs
+
+logger = logging.getLogger(__name__)
+
+class MockConfig(object):
+    """Shape and behaviour of the mock server"""
+    def __init__(self,companies=1,plant_types=4,plants=1000,custom_fields=('Serial','Location','Other'),latency=0.0,jitter=0.0,error_rate=0.0,rate_limit=None,max_page_size=250):
+        """
+            Arguments:
+                companies {int} -- Number of companies, IDs start at 0
+                plant_types {int} -- Number of plant types in each company, IDs start at 1
+                plants {int} -- Total number of plants, split evenly across every plant type
+                custom_fields {tuple} -- Names of the custom fields of every plant type
+                latency {float} -- Seconds every request is delayed by
+                jitter {float} -- Extra random delay of up to this many seconds
+                error_rate {float} -- Fraction of requests whose connection is dropped without a response,
+                    the urllib3 retries of Transport recover from these
+                rate_limit {float} -- Requests per second allowed before 429 responses are returned, None disables it
+                max_page_size {int} -- Largest pageSize honoured
+        """
+        self.companies=companies
+        self.plant_types=plant_types
+        self.plants=plants
+        self.custom_fields=tuple(custom_fields)
+        self.latency=latency
+        self.jitter=jitter
+        self.error_rate=error_rate
+        self.rate_limit=rate_limit
+        self.max_page_size=max_page_size
+
+    def plants_in(self,company_id,plant_type_id):
+        """Number of plants in a plant type"""
+        buckets=self.companies*self.plant_types
+        index=company_id*self.plant_types+plant_type_id-1
+        return self.plants//buckets+(1 if index < self.plants%buckets else 0)
+
+    def custom_field_id(self,plant_type_id,position):
+        return plant_type_id*100+position
+
+    def custom_fields_of(self,plant_type_id):
+        return [{'ID':self.custom_field_id(plant_type_id,position),'Name':name} for position,name in enumerate(self.custom_fields)]
+
+    def plant_custom_fields(self,plant_type_id,plant_id):
+        return [{
+            'CustomField':custom_field,
+            'Value':'{0}-{1}-{2}'.format(custom_field['Name'],plant_type_id,plant_id)
+            } for custom_field in self.custom_fields_of(plant_type_id)]
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version='HTTP/1.1'
+    #Headers and body are written separately, without this delayed ACKs add ~40ms per request
+    disable_nagle_algorithm=True
+    routes=[
+        (re.compile(r'/api/v1.0/companies/$'),'companies'),
+        (re.compile(r'/api/v1.0/companies/(\d+)$'),'company'),
+        (re.compile(r'/api/v1.0/companies/(\d+)/plantTypes/$'),'plant_types'),
+        (re.compile(r'/api/v1.0/companies/(\d+)/plantTypes/(\d+)/customFields/$'),'plant_type_custom_fields'),
+        (re.compile(r'/api/v1.0/companies/(\d+)/plantTypes/(\d+)/plants/$'),'plants'),
+        (re.compile(r'/api/v1.0/companies/(\d+)/plantTypes/(\d+)/plants/(\d+)/customFields/$'),'plant_custom_fields'),
+        (re.compile(r'/api/v1.0/companies/(\d+)/plantTypes/(\d+)/plants/(\d+)/customFields/(\d+)$'),'plant_custom_field'),
+    ]
+
+    def log_message(self,format,*args):
+        pass
+
+    def send(self,body,status=200,headers={}):
+        data=json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(data)))
+        for key,value in headers.items():
+            self.send_header(key,value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def paged(self,query,count,item):
+        """Sends one page of count items built by item(index)"""
+        page=int(query.get('page',['1'])[0])
+        page_size=min(int(query.get('pageSize',['30'])[0]),self.server.config.max_page_size)
+        pages=max(1,-(-count//page_size))
+        start=(page-1)*page_size
+        return self.send(
+            [item(index) for index in range(start,min(start+page_size,count))],
+            headers={'Result-Pages':str(pages),'Result-Total':str(count)})
+
+    def do_GET(self):
+        server=self.server
+        config=server.config
+        url=urlparse(self.path)
+        if url.path == '/_stats':
+            return self.send(server.stats())
+        server.count('requests')
+        if config.latency or config.jitter:
+            time.sleep(config.latency+random.random()*config.jitter)
+        if config.error_rate and random.random() < config.error_rate:
+            server.count('errors')
+            self.close_connection=True
+            return
+        if not server.allow():
+            server.count('rate_limited')
+            return self.send({'errors':[{'message':'Too Many Requests'}]},429,{'Retry-After':'1'})
+        query=parse_qs(url.query)
+        for pattern,route in self.routes:
+            match=pattern.match(url.path)
+            if match:
+                return getattr(self,'get_'+route)(query,*map(int,match.groups()))
+        self.send({'errors':[{'message':'Not Found'}]},404)
+
+    def get_companies(self,query):
+        return self.paged(query,self.server.config.companies,lambda index:{'ID':index,'Name':'Company {0}'.format(index)})
+
+    def get_company(self,query,company_id):
+        return self.send({'ID':company_id,'Name':'Company {0}'.format(company_id)})
+
+    def get_plant_types(self,query,company_id):
+        return self.paged(query,self.server.config.plant_types,lambda index:{'ID':index+1})
+
+    def get_plant_type_custom_fields(self,query,company_id,plant_type_id):
+        custom_fields=self.server.config.custom_fields_of(plant_type_id)
+        return self.paged(query,len(custom_fields),custom_fields.__getitem__)
+
+    def get_plants(self,query,company_id,plant_type_id):
+        config=self.server.config
+        columns=query.get('columns',['ID'])[0].split(',')
+        def plant(index):
+            results={'ID':index+1}
+            if 'CustomFields' in columns:
+                results['CustomFields']=config.plant_custom_fields(plant_type_id,index+1)
+            return results
+        return self.paged(query,config.plants_in(company_id,plant_type_id),plant)
+
+    def get_plant_custom_fields(self,query,company_id,plant_type_id,plant_id):
+        custom_fields=self.server.config.plant_custom_fields(plant_type_id,plant_id)
+        return self.paged(query,len(custom_fields),custom_fields.__getitem__)
+
+    def get_plant_custom_field(self,query,company_id,plant_type_id,plant_id,custom_field_id):
+        for custom_field in self.server.config.plant_custom_fields(plant_type_id,plant_id):
+            if custom_field['CustomField']['ID'] == custom_field_id:
+                return self.send(custom_field)
+        self.send({'errors':[{'message':'Not Found'}]},404)
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded mock Simpro server, counts requests for the benchmarks"""
+    daemon_threads=True
+    request_queue_size=128
+
+    def __init__(self,config,host='127.0.0.1',port=0):
+        super().__init__((host,port),MockHandler)
+        self.config=config
+        self.lock=threading.Lock()
+        self.counters={'requests':0,'errors':0,'rate_limited':0}
+        self.tokens=config.rate_limit
+        self.updated=time.monotonic()
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.server_address)
+
+    def count(self,name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def allow(self):
+        """Token bucket of rate_limit requests per second"""
+        if not self.config.rate_limit:
+            return True
+        with self.lock:
+            now=time.monotonic()
+            self.tokens=min(self.config.rate_limit,self.tokens+(now-self.updated)*self.config.rate_limit)
+            self.updated=now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def start(self):
+        """Serves on a daemon thread and returns the server url"""
+        threading.Thread(target=self.serve_forever,daemon=True).start()
+        return self.url
+
+def serve(config,ready=None,host='127.0.0.1',port=0):
+    """Serves forever, puts the server url on the ready queue once listening"""
+    server=MockServer(config,host,port)
+    if ready is not None:
+        ready.put(server.url)
+    server.serve_forever()
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host',default='127.0.0.1')
+    parser.add_argument('--port',type=int,default=8000)
+    parser.add_argument('--companies',type=int,default=1)
+    parser.add_argument('--plant-types',type=int,default=4)
+    parser.add_argument('--plants',type=int,default=1000)
+    parser.add_argument('--latency',type=float,default=0.0)
+    parser.add_argument('--jitter',type=float,default=0.0)
+    parser.add_argument('--error-rate',type=float,default=0.0)
+    parser.add_argument('--rate-limit',type=float,default=None)
+    args=parser.parse_args()
+    config=MockConfig(
+        companies=args.companies,
+        plant_types=args.plant_types,
+        plants=args.plants,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit)
+    print('Serving mock Simpro API on http://{0}:{1}'.format(args.host,args.port))
+    serve(config,host=args.host,port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'benchmarks'))
+
+from mock_server import MockServer,MockConfig
+
+@pytest.fixture
+def mock_simpro():
+    """Starts a mock Simpro server, call it with MockConfig arguments, returns the MockServer"""
+    servers=[]
+    def start(handler=None,**config):
+        server=MockServer(MockConfig(**config))
+        if handler is not None:
+            server.RequestHandlerClass=handler
+        server.start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,31 @@
+import json
+import pytest
+from SimproAPI import JsonDecoder
+
+DOCUMENTS=[
+    [1.5,-2e+10,3E-2,0,-0.25,12345678901234567890],
+    [{'ID':1,'Name':'café € "quoted" \\\\','Values':[1.25,None,True,False]},{'ID':2}],
+    ['a',[],{},[[1,[2.5e3]]],'😀',None],
+    [],
+]
+
+def split(body,offset):
+    return [body[:offset],body[offset:]]
+
+@pytest.mark.parametrize('document',DOCUMENTS)
+def test_iter_items_split_at_every_offset(document):
+    decoder=JsonDecoder('json')
+    for body in (json.dumps(document).encode(),json.dumps(document,ensure_ascii=False,indent=1).encode()):
+        for offset in range(len(body)+1):
+            assert list(decoder.iter_items(split(body,offset))) == document,offset
+
+@pytest.mark.parametrize('document',DOCUMENTS)
+def test_iter_items_byte_chunks(document):
+    body=json.dumps(document,ensure_ascii=False).encode()
+    assert list(JsonDecoder('json').iter_items(body[i:i+1] for i in range(len(body)))) == document
+
+@pytest.mark.parametrize('body',[b'{"ID":1}',b'[1,2',b'[1.',b'[1 2]',b'[{"ID":}]'])
+def test_iter_items_invalid(body):
+    for offset in range(len(body)+1):
+        with pytest.raises(ValueError):
+            list(JsonDecoder('json').iter_items(split(body,offset)))
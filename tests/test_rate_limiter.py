@@ -0,0 +1,37 @@
+import time
+import pytest
+from SimproAPI import Sessions,RateLimiter
+
+@pytest.mark.parametrize('arguments',[{'rate':0},{'rate':-1},{'min_rate':0},{'min_rate':-0.5}])
+def test_rejects_rates_of_zero_or_less(arguments):
+    with pytest.raises(ValueError):
+        RateLimiter(**arguments)
+
+def test_acquire_paces_requests():
+    rate_limiter=RateLimiter(rate=20,burst=1)
+    start=time.monotonic()
+    for _ in range(11):
+        rate_limiter.acquire()
+    #The first token is free, the other ten wait 1/20s each
+    assert time.monotonic()-start >= 0.45
+
+def test_penalize_blocks_and_halves_the_rate():
+    rate_limiter=RateLimiter(rate=20,min_rate=8)
+    rate_limiter.penalize(0.3)
+    assert rate_limiter.state['current_rate'] == 10
+    start=time.monotonic()
+    rate_limiter.acquire()
+    assert time.monotonic()-start >= 0.25
+    rate_limiter.penalize(0)
+    assert rate_limiter.state['current_rate'] == 8
+
+def test_backs_off_when_the_server_rate_limits(mock_simpro):
+    server=mock_simpro(rate_limit=5)
+    rate_limiter=RateLimiter(rate=50,min_rate=5)
+    with Sessions(server.url,'token',rate_limiter=rate_limiter) as session:
+        results=[session.json(session.companies_get_specific(0)) for _ in range(12)]
+    assert results == [{'ID':0,'Name':'Company 0'}]*12
+    stats=server.stats()
+    assert stats['rate_limited'] >= 1
+    assert stats['requests'] == 12+stats['rate_limited']
+    assert rate_limiter.state['current_rate'] < 50
@@ -0,0 +1,102 @@
+import datetime
+import threading
+import concurrent.futures
+import pytest
+from mock_server import MockHandler
+from SimproAPI import Sessions,TokenProvider,SingleFlight,ResponseCache
+
+class TokenHandler(MockHandler):
+    """Rejects requests that don't carry the server's current token"""
+    def do_GET(self):
+        if self.headers.get('Authorization') != 'Bearer '+self.server.valid_token:
+            self.server.count('requests')
+            return self.send({'errors':[{'message':'Unauthorized'}]},401)
+        return super().do_GET()
+
+class ETagHandler(MockHandler):
+    """Sends an ETag with every company and answers a matching If-None-Match with 304"""
+    def get_company(self,query,company_id):
+        etag='"company-{0}"'.format(company_id)
+        if self.headers.get('If-None-Match') == etag:
+            self.server.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag',etag)
+            self.send_header('Content-Length','0')
+            return self.end_headers()
+        return self.send({'ID':company_id,'Name':'Company {0}'.format(company_id)},headers={'ETag':etag})
+
+class FakeTokenManager(object):
+    """Stands in for TokenManager, a refresh swaps to the token the server accepts"""
+    server='https://example.simprocloud.com'
+    client_id='client'
+    username='user'
+
+    def __init__(self,mock_server):
+        self.mock_server=mock_server
+        self.access_token='expired'
+        self.expires=datetime.datetime.now().astimezone()+datetime.timedelta(hours=1)
+        self.refreshes=0
+
+    def update_token(self,stale_token=None,refresh_margin=300):
+        self.refreshes += 1
+        self.access_token=self.mock_server.valid_token
+
+def concurrently(function,count):
+    """Calls function from count threads released at the same time"""
+    barrier=threading.Barrier(count)
+    def call():
+        barrier.wait()
+        return function()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=count) as executor:
+        return [future.result() for future in [executor.submit(call) for _ in range(count)]]
+
+def test_concurrent_401s_refresh_the_token_once(mock_simpro):
+    server=mock_simpro(handler=TokenHandler,latency=0.05)
+    server.valid_token='fresh'
+    token_manager=FakeTokenManager(server)
+    with Sessions(server.url,TokenProvider(token_manager),pool_maxsize=8) as session:
+        results=concurrently(lambda:session.json(session.companies_get_specific(0)),8)
+    assert results == [{'ID':0,'Name':'Company 0'}]*8
+    assert token_manager.refreshes == 1
+
+def test_single_flight_coalesces_identical_requests(mock_simpro):
+    server=mock_simpro(latency=0.2)
+    single_flight=SingleFlight()
+    with Sessions(server.url,'token',pool_maxsize=8,single_flight=single_flight) as session:
+        results=concurrently(lambda:session.json(session.companies_get_specific(0)),8)
+    assert results == [{'ID':0,'Name':'Company 0'}]*8
+    #Every caller decodes its own copy
+    assert len({id(result) for result in results}) == 8
+    assert server.stats()['requests'] == 1
+    assert single_flight.stats() == {'requests':1,'coalesced':7}
+
+def test_single_flight_keeps_tokens_apart(mock_simpro):
+    server=mock_simpro(latency=0.2)
+    single_flight=SingleFlight()
+    with Sessions(server.url,'first',single_flight=single_flight) as first, \
+            Sessions(server.url,'second',single_flight=single_flight) as second:
+        concurrently(lambda:first.companies_get_specific(0),2)
+        concurrently(lambda:second.companies_get_specific(0),2)
+    assert server.stats()['requests'] == 2
+
+def test_cache_revalidates_stale_entries(mock_simpro):
+    server=mock_simpro(handler=ETagHandler)
+    server.counters['not_modified']=0
+    cache=ResponseCache(ttl={'companies_get_specific':0})
+    with Sessions(server.url,'token',cache=cache) as session:
+        first=session.json(session.companies_get_specific(0))
+        first['Name']='Changed'
+        second=session.json(session.companies_get_specific(0))
+    assert second == {'ID':0,'Name':'Company 0'}
+    assert server.stats()['not_modified'] == 1
+    stats=cache.stats()
+    assert (stats['hits'],stats['misses'],stats['revalidated']) == (1,1,1)
+
+def test_cache_keeps_tokens_apart(mock_simpro):
+    server=mock_simpro()
+    cache=ResponseCache()
+    with Sessions(server.url,'first',cache=cache) as first, Sessions(server.url,'second',cache=cache) as second:
+        first.companies_get_specific(0)
+        first.companies_get_specific(0)
+        second.companies_get_specific(0)
+    assert server.stats()['requests'] == 2
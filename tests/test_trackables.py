@@ -0,0 +1,73 @@
+import itertools
+import pytest
+from SimproAPI import Trackables,CrawlCheckpoint
+
+COMPANIES=2
+PLANT_TYPES=3
+PLANTS=60
+CUSTOM_FIELD_NAMES=['Serial','Location']
+
+def expected_plants():
+    """(company_id,plant_type_id,plant_id) of every plant the mock server holds"""
+    plants_per_type=PLANTS//(COMPANIES*PLANT_TYPES)
+    return {(company_id,plant_type_id,plant_id)
+        for company_id in range(COMPANIES)
+        for plant_type_id in range(1,PLANT_TYPES+1)
+        for plant_id in range(1,plants_per_type+1)}
+
+def company_plants(companies):
+    return [(company['id'],plant_type['id'],plant['id'],plant['custom_fields'])
+        for company in companies
+        for plant_type in company['trackable_plants']
+        for plant in plant_type['trackable_plant']]
+
+def record_plants(records):
+    return [(record['company_id'],record['plant_type_id'],record['plant_id'],record['custom_fields']) for record in records]
+
+def check_plants(plants):
+    keys=[plant[:3] for plant in plants]
+    assert len(keys) == len(set(keys))
+    assert set(keys) == expected_plants()
+    for company_id,plant_type_id,plant_id,custom_fields in plants:
+        assert [custom_field['value'] for custom_field in custom_fields] == [
+            '{0}-{1}-{2}'.format(name,plant_type_id,plant_id) for name in CUSTOM_FIELD_NAMES]
+
+@pytest.fixture
+def trackables(mock_simpro):
+    server=mock_simpro(companies=COMPANIES,plant_types=PLANT_TYPES,plants=PLANTS)
+    with Trackables(server.url,'token') as trackables:
+        yield trackables
+
+@pytest.mark.parametrize('fetch_mode',['specific','batch','columns'])
+@pytest.mark.parametrize('concurrently',[False,True])
+def test_get_companies(trackables,fetch_mode,concurrently):
+    companies=list(trackables.get_companies([1,0],CUSTOM_FIELD_NAMES,concurrently=concurrently,fetch_mode=fetch_mode))
+    assert [company['id'] for company in companies] == [1,0]
+    check_plants(company_plants(companies))
+
+@pytest.mark.parametrize('fetch_mode',['specific','batch','columns'])
+@pytest.mark.parametrize('concurrently',[False,True])
+def test_get_companies_stream(trackables,fetch_mode,concurrently):
+    check_plants(record_plants(trackables.get_companies_stream([0,1],CUSTOM_FIELD_NAMES,concurrently=concurrently,fetch_mode=fetch_mode)))
+
+@pytest.mark.parametrize('concurrently',[False,True])
+def test_get_companies_stream_resume(trackables,tmp_path,concurrently):
+    checkpoint=CrawlCheckpoint(str(tmp_path/'checkpoint.sqlite'))
+    records=[]
+    #Interrupt the crawl a few times, each resume must carry on without repeating a plant
+    for stop in (7,25,1):
+        crawl=trackables.get_companies_stream([0,1],CUSTOM_FIELD_NAMES,concurrently=concurrently,fetch_mode='batch',checkpoint=checkpoint)
+        records.extend(itertools.islice(crawl,stop))
+        crawl.close()
+    records.extend(trackables.get_companies_stream([0,1],CUSTOM_FIELD_NAMES,concurrently=concurrently,fetch_mode='batch',checkpoint=checkpoint))
+    check_plants(record_plants(records))
+
+@pytest.mark.parametrize('concurrently',[False,True])
+def test_get_companies_resume(trackables,tmp_path,concurrently):
+    checkpoint=CrawlCheckpoint(str(tmp_path/'checkpoint.sqlite'))
+    crawl=trackables.get_companies([0,1],CUSTOM_FIELD_NAMES,concurrently=concurrently,fetch_mode='batch',checkpoint=checkpoint)
+    companies=[next(crawl)]
+    crawl.close()
+    companies.extend(trackables.get_companies([0,1],CUSTOM_FIELD_NAMES,concurrently=concurrently,fetch_mode='batch',checkpoint=checkpoint))
+    assert [company['id'] for company in companies] == [0,1]
+    check_plants(company_plants(companies))